@@ -0,0 +1,113 @@
+"""Async favorite, shopping cart and subscribe toggles for ASGI servers.
+
+Enabled with ``ASYNC_TOGGLES``; the routes shadow the DRF actions of the
+same URLs. Django 3.2 has no async ORM, so each toggle runs its database
+work as one ``sync_to_async`` call in the thread pool while the event
+loop keeps serving other requests.
+"""
+from http import HTTPStatus
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.http import HttpResponse
+from rest_framework.exceptions import (
+    AuthenticationFailed,
+    MethodNotAllowed,
+    NotAuthenticated,
+)
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.views import exception_handler
+
+from recipes.models import Error, Favorite, ShoppingCart
+
+from . import toggles
+
+
+ALLOWED_METHODS = ("POST", "DELETE")
+
+
+def _run_toggle(request, toggle, *args):
+    """Authenticate like the DRF views and run ``toggle`` in a thread."""
+    close_old_connections()
+    request = Request(
+        request,
+        authenticators=[
+            authentication()
+            for authentication in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+        ],
+    )
+    try:
+        if not request.user.is_authenticated:
+            raise NotAuthenticated
+        if request.method not in ALLOWED_METHODS:
+            raise MethodNotAllowed(request.method)
+        status, data = toggle(request, *args)
+        headers = {}
+    except Exception as error:
+        if isinstance(error, (NotAuthenticated, AuthenticationFailed)):
+            # The same 401/403 choice as APIView.handle_exception makes.
+            authenticators = request.authenticators
+            if authenticators:
+                header = authenticators[0].authenticate_header(request)
+                error.auth_header = header
+            else:
+                error.status_code = HTTPStatus.FORBIDDEN
+        response = exception_handler(error, dict(request=request))
+        if response is None:
+            raise
+        status, data = response.status_code, response.data
+        headers = {
+            header: value
+            for header, value in response.items()
+            if header != "Content-Type"
+        }
+        if isinstance(error, MethodNotAllowed):
+            headers["Allow"] = ", ".join(ALLOWED_METHODS)
+    finally:
+        close_old_connections()
+    return status, data, headers
+
+
+async def _respond(request, toggle, *args):
+    status, data, headers = await sync_to_async(
+        _run_toggle, thread_sensitive=False
+    )(request, toggle, *args)
+    if data is None:
+        response = HttpResponse(status=status)
+    else:
+        response = HttpResponse(
+            JSONRenderer().render(data),
+            status=status,
+            content_type="application/json",
+        )
+    for header, value in headers.items():
+        response[header] = value
+    return response
+
+
+async def favorite(request, pk):
+    return await _respond(
+        request, toggles.toggle_recipe, pk, Favorite, Error.ALREADY_FAVORITED
+    )
+
+
+async def shopping_cart(request, pk):
+    return await _respond(
+        request,
+        toggles.toggle_recipe,
+        pk,
+        ShoppingCart,
+        Error.ALREADY_IN_SHOPPING_CART,
+    )
+
+
+async def subscribe(request, id):
+    return await _respond(request, toggles.toggle_subscription, id)
+
+
+# Token authentication does not use cookies; csrf_exempt itself cannot wrap
+# coroutine functions in Django 3.2.
+for view in (favorite, shopping_cart, subscribe):
+    view.csrf_exempt = True
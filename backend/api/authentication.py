@@ -0,0 +1,158 @@
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from rest_framework.authentication import TokenAuthentication
+
+
+SHARED_KEY = "auth_token:{}"
+REVOKED_KEY = "auth_token_revoked:{}"
+
+
+class TokenUserCache:
+    """Bounded per-process LRU of tokens and their users.
+
+    Entries expire ``ttl`` seconds after they were stored. With ``shared``
+    the default Django cache backs the LRU, so processes share the lookups.
+    Revoking the tokens of a user stores the time in the "versions" cache,
+    and every hit checks it, so other processes drop the entries loaded
+    before it at once. Callers get copies, so changes to a user never leak
+    into the cache.
+    """
+
+    def __init__(self, max_size, ttl, shared):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        # Lookups started before an invalidation must not be stored.
+        self.generation = 0
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _copy(entry):
+        user, token = entry
+        user, token = copy.copy(user), copy.copy(token)
+        token.user = user
+        return user, token
+
+    @staticmethod
+    def _revoked(entry, loaded_at):
+        user, _ = entry
+        revoked_at = caches["versions"].get(REVOKED_KEY.format(user.pk))
+        return revoked_at is not None and revoked_at >= loaded_at
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            expires, loaded_at, entry = self._entries.get(key, (0, 0, None))
+            if expires <= now:
+                self._entries.pop(key, None)
+                entry = None
+        if entry is not None and self._revoked(entry, loaded_at):
+            with self._lock:
+                self._entries.pop(key, None)
+            entry = None
+        if entry is not None:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                self.hits += 1
+            return self._copy(entry)
+        if self.shared:
+            shared = cache.get(SHARED_KEY.format(key))
+            if shared is not None and not self._revoked(*shared):
+                with self._lock:
+                    self.shared_hits += 1
+                    self._store(key, *shared, now)
+                return self._copy(shared[0])
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _store(self, key, entry, loaded_at, now):
+        self._entries[key] = (now + self.ttl, loaded_at, entry)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def set(self, key, user, token, generation, loaded_at):
+        """Store a lookup that started at ``loaded_at`` (``time.time()``)."""
+        entry = self._copy((user, token))
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._store(key, entry, loaded_at, time.monotonic())
+        if self.shared:
+            cache.set(
+                SHARED_KEY.format(key), (entry, loaded_at), timeout=self.ttl
+            )
+
+    def revoke(self, user_id, keys=()):
+        """Drop the cached tokens of a user in every process."""
+        # Entries live for ttl seconds after their lookup, and so does the
+        # stamp, with a margin for lookups that were slow to be stored.
+        caches["versions"].set(
+            REVOKED_KEY.format(user_id), time.time(), timeout=self.ttl * 2
+        )
+        keys = list(keys)
+        with self._lock:
+            self.generation += 1
+            self.invalidations += 1
+            for key in keys:
+                self._entries.pop(key, None)
+        if self.shared and keys:
+            cache.delete_many([SHARED_KEY.format(key) for key in keys])
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return dict(
+                pid=os.getpid(),
+                size=len(self._entries),
+                max_size=self.max_size,
+                ttl=self.ttl,
+                shared=self.shared,
+                hits=self.hits,
+                shared_hits=self.shared_hits,
+                misses=self.misses,
+                invalidations=self.invalidations,
+                hit_ratio=(
+                    round((self.hits + self.shared_hits) / lookups, 4)
+                    if lookups
+                    else None
+                ),
+            )
+
+
+token_cache = TokenUserCache(
+    max_size=settings.TOKEN_CACHE_SIZE,
+    ttl=settings.TOKEN_CACHE_TTL,
+    shared=settings.TOKEN_CACHE_SHARED,
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """``TokenAuthentication`` that looks tokens up in ``token_cache``.
+
+    Inactive users and unknown keys are rejected by the parent class and
+    never cached.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            return cached
+        generation = token_cache.generation
+        loaded_at = time.time()
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user, token, generation, loaded_at)
+        return user, token
@@ -0,0 +1,216 @@
+"""Synthetic data seeding and latency measurement for the API benchmarks."""
+import base64
+import csv
+import io
+import math
+import random
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+
+from recipes import counters
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    Subscription,
+    Tag,
+)
+
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+PASSWORD = "bench-password"
+INGREDIENTS_CSV = settings.BASE_DIR / "data" / "ingredients.csv"
+TAGS_CSV = settings.BASE_DIR / "data" / "recipes_tag.csv"
+
+
+def image_base64(size=(64, 64)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "orange").save(buffer, "PNG")
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f"data:image/png;base64,{encoded}"
+
+
+def _load_catalog(model, path):
+    if not model.objects.exists():
+        with open(path, encoding="utf-8") as file:
+            model.objects.bulk_create(
+                (model(**row) for row in csv.DictReader(file)),
+                batch_size=BATCH_SIZE,
+                ignore_conflicts=True,
+            )
+    return list(model.objects.values_list("id", flat=True))
+
+
+def seed(
+    users=100,
+    recipes_per_user=10,
+    ingredients_per_recipe=8,
+    subscriptions_per_user=10,
+    favorites_per_user=20,
+    cart_per_user=5,
+    prefix="bench",
+    rng=None,
+):
+    """Bulk insert a synthetic dataset and return the created users.
+
+    Tags and ingredients come from the ``data`` catalogs unless the
+    database already has them. Every user gets ``PASSWORD`` as password.
+    """
+    rng = rng or random.Random(0)
+    tag_ids = _load_catalog(Tag, TAGS_CSV)
+    ingredient_ids = _load_catalog(Ingredient, INGREDIENTS_CSV)
+    ingredients_per_recipe = min(ingredients_per_recipe, len(ingredient_ids))
+    password = make_password(PASSWORD)
+    User.objects.bulk_create(
+        (
+            User(
+                username=f"{prefix}-{index}",
+                email=f"{prefix}-{index}@example.com",
+                first_name="Bench",
+                last_name=str(index),
+                password=password,
+            )
+            for index in range(users)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    user_ids = list(
+        User.objects.filter(username__startswith=f"{prefix}-")
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    Recipe.objects.bulk_create(
+        (
+            Recipe(
+                author_id=user_id,
+                name=f"{prefix} recipe {user_id}-{index}",
+                text="Synthetic recipe for benchmarks. " * 8,
+                cooking_time=rng.randint(5, 180),
+                image=f"{settings.RECIPES_IMAGES_PATH}{prefix}.png",
+            )
+            for user_id in user_ids
+            for index in range(recipes_per_user)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    recipe_ids = list(
+        Recipe.objects.filter(author_id__in=user_ids).values_list(
+            "id", flat=True
+        )
+    )
+    Recipe.tags.through.objects.bulk_create(
+        (
+            Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id in recipe_ids
+            for tag_id in rng.sample(tag_ids, rng.randint(1, len(tag_ids)))
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    RecipeIngredient.objects.bulk_create(
+        (
+            RecipeIngredient(
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_id,
+                amount=rng.randint(1, 500),
+            )
+            for recipe_id in recipe_ids
+            for ingredient_id in rng.sample(
+                ingredient_ids, ingredients_per_recipe
+            )
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    Subscription.objects.bulk_create(
+        (
+            Subscription(subscriber_id=user_id, author_id=author_id)
+            for user_id in user_ids
+            for author_id in rng.sample(
+                user_ids, min(subscriptions_per_user + 1, len(user_ids))
+            )[:subscriptions_per_user]
+            if author_id != user_id
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    for model, per_user in (
+        (Favorite, favorites_per_user),
+        (ShoppingCart, cart_per_user),
+    ):
+        model.objects.bulk_create(
+            (
+                model(user_id=user_id, recipe_id=recipe_id)
+                for user_id in user_ids
+                for recipe_id in rng.sample(
+                    recipe_ids, min(per_user, len(recipe_ids))
+                )
+            ),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+    for counter in counters.COUNTERS:
+        for _ in counters.recount(counter, chunk_size=BATCH_SIZE):
+            pass
+    return User.objects.filter(id__in=user_ids).order_by("id")
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of a non-empty list of numbers."""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class Recorder:
+    """Collect latency, query count and size samples per endpoint."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    def request(self, name, client, method, path, **kwargs):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(client, method)(path, **kwargs)
+            content = (
+                b"".join(response.streaming_content)
+                if response.streaming
+                else response.content
+            )
+            elapsed = time.perf_counter() - started
+        self.samples[name].append(
+            dict(
+                seconds=elapsed,
+                queries=len(queries),
+                bytes=len(content),
+                status=response.status_code,
+            )
+        )
+        return response
+
+    def summary(self):
+        report = {}
+        for name, samples in self.samples.items():
+            latencies = [sample["seconds"] * 1000 for sample in samples]
+            report[name] = dict(
+                requests=len(samples),
+                statuses=sorted({sample["status"] for sample in samples}),
+                p50_ms=round(percentile(latencies, 50), 3),
+                p95_ms=round(percentile(latencies, 95), 3),
+                p99_ms=round(percentile(latencies, 99), 3),
+                mean_ms=round(sum(latencies) / len(latencies), 3),
+                queries=max(sample["queries"] for sample in samples),
+                bytes=round(
+                    sum(sample["bytes"] for sample in samples) / len(samples)
+                ),
+            )
+        return report
@@ -0,0 +1,157 @@
+import csv
+import json
+from itertools import chain, groupby, islice
+from operator import itemgetter
+
+from django.db.models import CharField, F, IntegerField, Sum, Value
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from recipes.models import Recipe, RecipeIngredient
+
+
+TIME_FORMAT = "%d-%m-%Y %H:%M"
+CHUNK_SIZE = 500
+FILENAME = "shopping_cart.{}"
+
+INGREDIENTS = 0
+RECIPES = 1
+SECTIONS = (INGREDIENTS, RECIPES)
+TITLES = {
+    INGREDIENTS: "Список покупок",
+    RECIPES: "Список рецептов",
+}
+
+
+def get_shopping_cart_rows(user):
+    """Summed ingredients and recipe names of a cart in one UNION query.
+
+    Every row is a dict with ``name``, ``measurement_unit``, ``amount`` and
+    ``kind``; ingredients (``INGREDIENTS``) go before recipes (``RECIPES``).
+    """
+    ingredients = (
+        RecipeIngredient.objects.filter(recipe__shoppingcarts__user=user)
+        .order_by()
+        .values(
+            name=F("ingredient__name"),
+            measurement_unit=F("ingredient__measurement_unit"),
+        )
+        .annotate(
+            amount=Sum("amount"),
+            kind=Value(INGREDIENTS, output_field=IntegerField()),
+        )
+    )
+    recipes = (
+        Recipe.objects.filter(shoppingcarts__user=user)
+        .order_by()
+        .values("name")
+        .annotate(
+            measurement_unit=Value("", output_field=CharField()),
+            amount=Value(0, output_field=IntegerField()),
+            kind=Value(RECIPES, output_field=IntegerField()),
+        )
+    )
+    return ingredients.union(recipes, all=True).order_by("kind", "name")
+
+
+def _iter_sections(rows):
+    """Split ordered rows into sections, yielding empty ones as well."""
+    groups = groupby(rows, key=itemgetter("kind"))
+    kind, items = next(groups, (None, ()))
+    for section in SECTIONS:
+        if kind == section:
+            yield section, items
+            kind, items = next(groups, (None, ()))
+        else:
+            yield section, ()
+
+
+def _current_time():
+    return timezone.now().strftime(TIME_FORMAT)
+
+
+def render_txt(rows):
+    yield f"Дата и время: {_current_time()}\n"
+    for section, items in _iter_sections(rows):
+        yield f"\n{TITLES[section]}:\n"
+        for index, item in enumerate(items, start=1):
+            if section == INGREDIENTS:
+                yield (
+                    f"{index}. {item['name'].capitalize()} "
+                    f"({item['measurement_unit']}) - {item['amount']}\n"
+                )
+            else:
+                yield f"{index}. {item['name']}\n"
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def render_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(("Дата и время", _current_time()))
+    for section, items in _iter_sections(rows):
+        yield writer.writerow(())
+        if section == INGREDIENTS:
+            yield writer.writerow(("Продукт", "Ед. измерения", "Количество"))
+            for item in items:
+                yield writer.writerow(
+                    (item["name"], item["measurement_unit"], item["amount"])
+                )
+        else:
+            yield writer.writerow(("Рецепт",))
+            for item in items:
+                yield writer.writerow((item["name"],))
+
+
+def render_json(rows):
+    keys = {INGREDIENTS: "ingredients", RECIPES: "recipes"}
+    yield "{" + f'"created": {json.dumps(_current_time())}'
+    for section, items in _iter_sections(rows):
+        yield f', "{keys[section]}": ['
+        for index, item in enumerate(items):
+            data = (
+                dict(
+                    name=item["name"],
+                    measurement_unit=item["measurement_unit"],
+                    amount=item["amount"],
+                )
+                if section == INGREDIENTS
+                else dict(name=item["name"])
+            )
+            yield ("," if index else "") + json.dumps(data, ensure_ascii=False)
+        yield "]"
+    yield "}"
+
+
+FORMATS = {
+    "txt": (render_txt, "text/plain; charset=utf-8"),
+    "csv": (render_csv, "text/csv; charset=utf-8"),
+    "json": (render_json, "application/json"),
+}
+
+
+def shopping_cart_response(user, file_format):
+    """Stream the shopping cart of ``user`` as an attachment.
+
+    The first ``CHUNK_SIZE`` pieces are rendered up front: if that already
+    exhausts the export, a plain response with Content-Length is sent,
+    otherwise the rest is streamed straight from the database cursor.
+    """
+    render, content_type = FORMATS[file_format]
+    rows = get_shopping_cart_rows(user).iterator(chunk_size=CHUNK_SIZE)
+    chunks = (chunk.encode() for chunk in render(rows))
+    head = list(islice(chunks, CHUNK_SIZE))
+    if len(head) < CHUNK_SIZE:
+        response = HttpResponse(b"".join(head), content_type=content_type)
+        response["Content-Length"] = len(response.content)
+    else:
+        response = StreamingHttpResponse(
+            chain(head, chunks), content_type=content_type
+        )
+    response["Content-Disposition"] = (
+        f'attachment; filename="{FILENAME.format(file_format)}"'
+    )
+    return response
@@ -0,0 +1,189 @@
+import base64
+import binascii
+import tempfile
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files import File
+from PIL import Image, ImageOps
+from rest_framework import serializers
+from rest_framework.exceptions import ErrorDetail
+
+from recipes import thumbnails
+from recipes.models import Error
+
+
+# Base64 characters decoded at a time, whitespace included.
+DECODE_CHUNK_SIZE = 64 * 1024
+SPOOL_SIZE = 512 * 1024
+BASE64_MARKER = ";base64,"
+EXTENSIONS = {"JPEG": "jpg", "PNG": "png", "GIF": "gif", "WEBP": "webp"}
+SAVE_OPTIONS = {
+    "JPEG": dict(quality=85, optimize=True),
+    "PNG": dict(optimize=True),
+    "WEBP": dict(quality=85),
+}
+
+
+class Base64ImageField(serializers.ImageField):
+    """Image sent as a base64 string or a ``data:`` URI.
+
+    The string is decoded chunk by chunk into a temporary file, the byte
+    and pixel limits are checked before the pixels are decoded and the
+    image is re-encoded to fit into ``IMAGE_MAX_SIDE``.
+    """
+
+    def to_internal_value(self, data):
+        if data in ("", None):
+            return None
+        if not isinstance(data, str):
+            raise serializers.ValidationError(Error.INVALID_IMAGE)
+        start = data.find(BASE64_MARKER, 0, 256)
+        start = 0 if start == -1 else start + len(BASE64_MARKER)
+        if (len(data) - start) // 4 * 3 > settings.IMAGE_UPLOAD_MAX_BYTES:
+            raise serializers.ValidationError(
+                Error.IMAGE_TOO_LARGE.format(settings.IMAGE_UPLOAD_MAX_BYTES)
+            )
+        with self.decode(data, start) as source:
+            return self.reencode(source)
+
+    @staticmethod
+    def decode(data, start):
+        file = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+        # MIME wraps base64 in lines; without the whitespace a chunk may
+        # end mid-quantum, and that rest is decoded with the next one.
+        rest = ""
+        try:
+            for offset in range(start, len(data), DECODE_CHUNK_SIZE):
+                chunk = rest + "".join(
+                    data[offset:offset + DECODE_CHUNK_SIZE].split()
+                )
+                end = len(chunk) - len(chunk) % 4
+                file.write(base64.b64decode(chunk[:end], validate=True))
+                rest = chunk[end:]
+            file.write(base64.b64decode(rest, validate=True))
+        except binascii.Error:
+            file.close()
+            raise serializers.ValidationError(Error.INVALID_IMAGE)
+        file.seek(0)
+        return file
+
+    @staticmethod
+    def reencode(source):
+        side = settings.IMAGE_MAX_SIDE
+        try:
+            image = Image.open(source)
+            if image.format not in EXTENSIONS:
+                raise serializers.ValidationError(
+                    Error.UNSUPPORTED_IMAGE_FORMAT.format(
+                        ", ".join(EXTENSIONS)
+                    )
+                )
+            file_format = image.format
+            width, height = image.size
+            if width * height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+                raise Image.DecompressionBombError
+            # JPEG images are decoded straight at a reduced scale.
+            image.draft(image.mode, (side, side))
+            image.thumbnail((side, side))
+            image = ImageOps.exif_transpose(image)
+            if file_format == "JPEG" and image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            output = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+            image.save(
+                output, file_format, **SAVE_OPTIONS.get(file_format, {})
+            )
+        except Image.DecompressionBombError:
+            raise serializers.ValidationError(
+                Error.IMAGE_TOO_MANY_PIXELS.format(
+                    settings.IMAGE_UPLOAD_MAX_PIXELS
+                )
+            )
+        except (OSError, SyntaxError, ValueError):
+            raise serializers.ValidationError(Error.INVALID_IMAGE)
+        output.seek(0)
+        return File(
+            output, name=f"{uuid.uuid4().hex}.{EXTENSIONS[file_format]}"
+        )
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """URLs of the fixed-size variants of an image, keyed by variant.
+
+    Variants that are not recorded as generated point to the original.
+    """
+
+    def to_representation(self, file):
+        if not file:
+            return None
+        request = self.context.get("request")
+        return {
+            variant: request.build_absolute_uri(url) if request else url
+            for variant, url in thumbnails.variant_urls(file).items()
+        }
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary key that a ``BulkListField`` resolves.
+
+    Validation only converts the key; the enclosing list looks up the keys
+    of all its items together, so on its own the field returns the key.
+    """
+
+    def to_internal_value(self, data):
+        if self.pk_field is not None:
+            data = self.pk_field.to_internal_value(data)
+        try:
+            if isinstance(data, bool):
+                raise TypeError
+            return self.get_queryset().model._meta.pk.to_python(data)
+        except (TypeError, ValueError, DjangoValidationError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+
+class BulkListField(serializers.ListField):
+    """List that resolves its ``BulkPrimaryKeyRelatedField`` keys.
+
+    The child is either such a field or a serializer with such fields.
+    Every field costs one ``in_bulk`` query, and all the missing keys are
+    reported at once, by item index like other list errors.
+    """
+
+    def _related_fields(self):
+        if isinstance(self.child, BulkPrimaryKeyRelatedField):
+            return [self.child]
+        return [
+            field
+            for field in getattr(self.child, "fields", {}).values()
+            if isinstance(field, BulkPrimaryKeyRelatedField)
+        ]
+
+    def to_internal_value(self, data):
+        items = super().to_internal_value(data)
+        errors = {}
+        for field in self._related_fields():
+            nested = field is not self.child
+            keys = [item[field.source] if nested else item for item in items]
+            objects = field.get_queryset().in_bulk(set(keys))
+            for index, key in enumerate(keys):
+                if key not in objects:
+                    message = ErrorDetail(
+                        field.error_messages["does_not_exist"].format(
+                            pk_value=key
+                        ),
+                        code="does_not_exist",
+                    )
+                    if nested:
+                        errors.setdefault(index, {})[field.field_name] = [
+                            message
+                        ]
+                    else:
+                        errors[index] = [message]
+                elif nested:
+                    items[index][field.source] = objects[key]
+                else:
+                    items[index] = objects[key]
+        if errors:
+            raise serializers.ValidationError(errors)
+        return items
@@ -1,11 +1,13 @@
 from django_filters.rest_framework import FilterSet
 from django_filters.rest_framework.filters import (
     BooleanFilter,
+    CharFilter,
     ModelMultipleChoiceFilter,
 )
 from rest_framework.filters import SearchFilter
 
 from recipes.models import Recipe, Tag
+from recipes.search import search as search_recipes
 
 
 class IngredientFilter(SearchFilter):
@@ -20,17 +22,29 @@ class RecipeFilterSet(FilterSet):
     )
     is_favorited = BooleanFilter(method="get_is_favorited")
     is_in_shopping_cart = BooleanFilter(method="get_is_in_shopping_cart")
+    search = CharFilter(method="get_search")
 
     class Meta:
         model = Recipe
-        fields = ("tags", "author", "is_favorited", "is_in_shopping_cart")
+        fields = (
+            "tags",
+            "author",
+            "is_favorited",
+            "is_in_shopping_cart",
+            "search",
+        )
 
     def get_is_favorited(self, recipes, name, value):
         if self.request.user.is_authenticated and value:
-            return recipes.filter(favorites__user=self.request.user)
+            return recipes.filter(is_favorited=True)
         return recipes
 
     def get_is_in_shopping_cart(self, recipes, name, value):
         if self.request.user.is_authenticated and value:
-            return recipes.filter(shoppingcarts__user=self.request.user)
+            return recipes.filter(is_in_shopping_cart=True)
         return recipes
+
+    def get_search(self, recipes, name, value):
+        return search_recipes(recipes, value).order_by(
+            "-search_rank", "-pub_date", "-id"
+        )
@@ -0,0 +1,98 @@
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+
+from recipes import catalog
+from recipes.models import Ingredient
+
+
+def normalize(name):
+    return name.strip().casefold()
+
+
+class IngredientPrefixIndex:
+    """Per-process sorted index of ingredient names for prefix lookups.
+
+    The index is built lazily on the first search and rebuilt when the
+    ingredient catalog version changes, so that writes made by other
+    processes and by the import commands are picked up. Local writes patch
+    it in place. As a safety net it is also rebuilt after ``ttl`` seconds.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._keys = None
+        self._ingredients = {}
+        self._built_at = 0.0
+        self._version = None
+
+    def _build(self):
+        self._version = catalog.get_version(catalog.INGREDIENTS)
+        ingredients = {
+            ingredient.id: ingredient
+            for ingredient in Ingredient.objects.order_by().iterator()
+        }
+        self._keys = sorted(
+            (normalize(ingredient.name), ingredient.id)
+            for ingredient in ingredients.values()
+        )
+        self._ingredients = ingredients
+        self._built_at = time.monotonic()
+
+    def _is_stale(self):
+        return (
+            self._keys is None
+            or self._version != catalog.get_version(catalog.INGREDIENTS)
+            or time.monotonic() - self._built_at > self.ttl
+        )
+
+    def search(self, prefix, limit=None):
+        prefix = normalize(prefix)
+        with self._lock:
+            if self._is_stale():
+                self._build()
+            result = []
+            for key, ingredient_id in self._keys[
+                bisect_left(self._keys, (prefix,)):
+            ]:
+                if not key.startswith(prefix) or len(result) == limit:
+                    break
+                result.append(self._ingredients[ingredient_id])
+            return result
+
+    def invalidate(self):
+        with self._lock:
+            self._keys = None
+            self._ingredients = {}
+
+    def _discard(self, ingredient_id):
+        old = self._ingredients.pop(ingredient_id, None)
+        if old is not None:
+            self._keys.remove((normalize(old.name), ingredient_id))
+
+    def update(self, ingredient):
+        with self._lock:
+            if self._keys is None:
+                return
+            self._discard(ingredient.id)
+            self._ingredients[ingredient.id] = Ingredient(
+                id=ingredient.id,
+                name=ingredient.name,
+                measurement_unit=ingredient.measurement_unit,
+            )
+            insort(self._keys, (normalize(ingredient.name), ingredient.id))
+            self._version = catalog.get_version(catalog.INGREDIENTS)
+
+    def remove(self, ingredient_id):
+        with self._lock:
+            if self._keys is not None:
+                self._discard(ingredient_id)
+                self._version = catalog.get_version(catalog.INGREDIENTS)
+
+
+ingredient_index = IngredientPrefixIndex(
+    ttl=settings.INGREDIENT_SEARCH_INDEX_TTL
+)
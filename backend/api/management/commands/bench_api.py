@@ -0,0 +1,326 @@
+import json
+import random
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import (
+    setup_test_environment,
+    teardown_test_environment,
+)
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api import benchmark
+from recipes.models import Ingredient, Recipe, Subscription, Tag, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic dataset and report latency, SQL query count and "
+        "response size of the API endpoints. Every route of api.urls is "
+        "driven except the e-mail flows of djoser (activation, "
+        "resend_activation, reset_password, reset_email, set_email and "
+        "their confirmations), which need the tokens it e-mails, and PUT, "
+        "PATCH and DELETE of /api/users/me/ and /api/users/{id}/, which "
+        "the frontend never calls"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--recipes-per-user", type=int, default=10)
+        parser.add_argument("--ingredients-per-recipe", type=int, default=8)
+        parser.add_argument("--subscriptions-per-user", type=int, default=10)
+        parser.add_argument("--favorites-per-user", type=int, default=20)
+        parser.add_argument("--cart-per-user", type=int, default=5)
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=50,
+            help="Number of requests per endpoint",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--output", help="Write the JSON report to this file"
+        )
+        parser.add_argument(
+            "--current-db",
+            action="store_true",
+            help=(
+                "Seed into the configured database instead of a throwaway "
+                "test database; the seeded rows are kept"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = None
+        if not options["current_db"]:
+            old_name = connection.settings_dict["NAME"]
+            connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with tempfile.TemporaryDirectory() as media_root:
+                with override_settings(MEDIA_ROOT=media_root):
+                    report = self.run(options)
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        self.print_report(report)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+
+    def run(self, options):
+        rng = random.Random(options["seed"])
+        started = time.perf_counter()
+        users = list(
+            benchmark.seed(
+                users=max(options["users"], 5),
+                recipes_per_user=options["recipes_per_user"],
+                ingredients_per_recipe=options["ingredients_per_recipe"],
+                subscriptions_per_user=options["subscriptions_per_user"],
+                favorites_per_user=options["favorites_per_user"],
+                cart_per_user=options["cart_per_user"],
+                prefix=f"bench-{int(time.time())}",
+                rng=rng,
+            )
+        )
+        seconds = time.perf_counter() - started
+        self.stdout.write(f"Seeded in {seconds:.1f}s")
+        recorder = benchmark.Recorder()
+        self.drive(recorder, users, options["requests"])
+        return dict(
+            meta=dict(
+                created=time.strftime("%Y-%m-%dT%H:%M:%S"),
+                vendor=connection.vendor,
+                seed_seconds=round(seconds, 3),
+                requests_per_endpoint=options["requests"],
+                dataset={
+                    key: options[key]
+                    for key in (
+                        "users",
+                        "recipes_per_user",
+                        "ingredients_per_recipe",
+                        "subscriptions_per_user",
+                        "favorites_per_user",
+                        "cart_per_user",
+                    )
+                },
+            ),
+            endpoints=recorder.summary(),
+        )
+
+    def drive(self, recorder, users, requests):
+        user, author, stranger, login_user, admin = users[:5]
+        client = self.client_for(user)
+        User.objects.filter(pk=admin.pk).update(is_staff=True)
+        admin_client = self.client_for(admin)
+        anonymous = APIClient()
+        recipe = Recipe.objects.filter(author=author).first()
+        untoggled = Recipe.objects.exclude(favorites__user=user).exclude(
+            shoppingcarts__user=user
+        )
+        toggled = untoggled.first()
+        bulk = dict(recipes=list(untoggled.values_list("id", flat=True)[:10]))
+        Subscription.objects.filter(subscriber=user, author=stranger).delete()
+        tag = Tag.objects.first()
+        ingredient = Ingredient.objects.first()
+        image = benchmark.image_base64()
+        payload = dict(
+            ingredients=[
+                dict(id=ingredient_id, amount=10)
+                for ingredient_id in Ingredient.objects.values_list(
+                    "id", flat=True
+                )[:8]
+            ],
+            tags=[tag.id],
+            image=image,
+            name="Benchmark recipe",
+            text="Benchmark",
+            cooking_time=10,
+        )
+        reads = (
+            ("users-list", client, "/api/users/"),
+            ("users-detail", client, f"/api/users/{author.id}/"),
+            ("users-me", client, "/api/users/me/"),
+            (
+                "users-subscriptions",
+                client,
+                "/api/users/subscriptions/?recipes_limit=3",
+            ),
+            ("tags-list", client, "/api/tags/"),
+            ("tags-detail", client, f"/api/tags/{tag.id}/"),
+            ("ingredients-list", client, "/api/ingredients/"),
+            (
+                "ingredients-search",
+                client,
+                f"/api/ingredients/?name={ingredient.name[:2]}",
+            ),
+            (
+                "ingredients-detail",
+                client,
+                f"/api/ingredients/{ingredient.id}/",
+            ),
+            ("recipes-list", client, "/api/recipes/"),
+            ("recipes-list-anonymous", anonymous, "/api/recipes/"),
+            ("recipes-list-cursor", client, "/api/recipes/?cursor="),
+            (
+                "recipes-list-filtered",
+                client,
+                f"/api/recipes/?tags={tag.slug}&is_favorited=1",
+            ),
+            ("recipes-detail", client, f"/api/recipes/{recipe.id}/"),
+            ("auth-token-cache", admin_client, "/api/auth/token-cache/"),
+            (
+                "recipes-get-link",
+                client,
+                f"/api/recipes/{recipe.id}/get-link/",
+            ),
+            (
+                "recipes-download-shopping-cart",
+                client,
+                "/api/recipes/download_shopping_cart/",
+            ),
+        )
+        for _ in range(requests):
+            for name, reader, path in reads:
+                recorder.request(name, reader, "get", path)
+            for name, path in (
+                ("recipes-favorite", f"/api/recipes/{toggled.id}/favorite/"),
+                (
+                    "recipes-shopping-cart",
+                    f"/api/recipes/{toggled.id}/shopping_cart/",
+                ),
+                ("users-subscribe", f"/api/users/{stranger.id}/subscribe/"),
+            ):
+                recorder.request(f"{name}-add", client, "post", path)
+                recorder.request(f"{name}-remove", client, "delete", path)
+            for name, path in (
+                ("recipes-favorite-bulk", "/api/recipes/favorite/bulk/"),
+                (
+                    "recipes-shopping-cart-bulk",
+                    "/api/recipes/shopping_cart/bulk/",
+                ),
+            ):
+                for suffix, method in (("add", "post"), ("remove", "delete")):
+                    recorder.request(
+                        f"{name}-{suffix}",
+                        client,
+                        method,
+                        path,
+                        data=bulk,
+                        format="json",
+                    )
+            response = recorder.request(
+                "recipes-create",
+                client,
+                "post",
+                "/api/recipes/",
+                data=payload,
+                format="json",
+            )
+            path = f"/api/recipes/{response.data['id']}/"
+            recorder.request(
+                "recipes-put",
+                client,
+                "put",
+                path,
+                data=dict(payload, name="Replaced"),
+                format="json",
+            )
+            recorder.request(
+                "recipes-update",
+                client,
+                "patch",
+                path,
+                data=dict(
+                    payload,
+                    name="Updated",
+                    ingredients=payload["ingredients"][1:],
+                ),
+                format="json",
+            )
+            recorder.request("recipes-delete", client, "delete", path)
+            recorder.request(
+                "users-avatar-put",
+                client,
+                "put",
+                "/api/users/me/avatar/",
+                data=dict(avatar=image),
+                format="json",
+            )
+            recorder.request(
+                "users-avatar-delete",
+                client,
+                "delete",
+                "/api/users/me/avatar/",
+            )
+            response = recorder.request(
+                "auth-token-login",
+                anonymous,
+                "post",
+                "/api/auth/token/login/",
+                data=dict(
+                    email=login_user.email, password=benchmark.PASSWORD
+                ),
+                format="json",
+            )
+            session = APIClient()
+            session.credentials(
+                HTTP_AUTHORIZATION=f"Token {response.data['auth_token']}"
+            )
+            recorder.request(
+                "auth-token-logout", session, "post", "/api/auth/token/logout/"
+            )
+            # A new user, so that the password change leaves the cached
+            # tokens and recipes of the seeded users alone.
+            username = f"bench-new-{time.time_ns()}"
+            response = recorder.request(
+                "users-create",
+                anonymous,
+                "post",
+                "/api/users/",
+                data=dict(
+                    email=f"{username}@example.com",
+                    username=username,
+                    first_name="Bench",
+                    last_name="New",
+                    password=benchmark.PASSWORD,
+                ),
+                format="json",
+            )
+            recorder.request(
+                "users-set-password",
+                self.client_for(User.objects.get(pk=response.data["id"])),
+                "post",
+                "/api/users/set_password/",
+                data=dict(
+                    current_password=benchmark.PASSWORD,
+                    new_password=f"{benchmark.PASSWORD}-new",
+                ),
+                format="json",
+            )
+
+    @staticmethod
+    def client_for(user):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=(
+                f"Token {Token.objects.get_or_create(user=user)[0].key}"
+            )
+        )
+        return client
+
+    def print_report(self, report):
+        columns = ("p50_ms", "p95_ms", "p99_ms", "queries", "bytes")
+        self.stdout.write(
+            f"{'endpoint':40}" + "".join(f"{column:>10}" for column in columns)
+        )
+        for name, stats in report["endpoints"].items():
+            self.stdout.write(
+                f"{name:40}"
+                + "".join(f"{stats[column]:>10}" for column in columns)
+            )
@@ -0,0 +1,127 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from api import benchmark
+
+
+# Connection settings of the compared profiles; the pool and the health
+# checks need the backend.postgresql engine.
+PROFILES = {
+    "per-request": dict(CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=False, POOL_SIZE=0),
+    "persistent": dict(
+        CONN_MAX_AGE=None, CONN_HEALTH_CHECKS=False, POOL_SIZE=0
+    ),
+    "persistent-checked": dict(
+        CONN_MAX_AGE=None, CONN_HEALTH_CHECKS=True, POOL_SIZE=0
+    ),
+    "pool": dict(CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=False, POOL_SIZE=1),
+    "pool-checked": dict(CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=True, POOL_SIZE=1),
+}
+POOLED_ENGINE = "backend.postgresql"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the database connection overhead of a request that runs "
+        "one query, with per-request, persistent and pooled connections"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--database", default="default")
+        parser.add_argument(
+            "--output", help="Write the JSON report to this file"
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        original = {
+            key: connection.settings_dict.get(key) for key in PROFILES["pool"]
+        }
+        profiles = {
+            name: profile
+            for name, profile in PROFILES.items()
+            if connection.settings_dict["ENGINE"] == POOLED_ENGINE
+            or not (profile["POOL_SIZE"] or profile["CONN_HEALTH_CHECKS"])
+        }
+        results = {}
+        try:
+            for name, profile in profiles.items():
+                connection.close()
+                connection.settings_dict.update(profile)
+                results[name] = self.measure(connection, options["requests"])
+                connection.close()
+        finally:
+            connection.settings_dict.update(original)
+        report = dict(
+            meta=dict(
+                created=time.strftime("%Y-%m-%dT%H:%M:%S"),
+                vendor=connection.vendor,
+                engine=connection.settings_dict["ENGINE"],
+                requests=options["requests"],
+            ),
+            profiles=results,
+        )
+        self.print_report(report)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump(report, file, indent=2)
+
+    def measure(self, connection, requests):
+        connects = []
+
+        def count(sender, connection, **kwargs):
+            connects.append(connection.alias)
+
+        connection_created.connect(count)
+        latencies = []
+        backend_pids = set()
+        try:
+            for _ in range(requests):
+                started = time.perf_counter()
+                # The request signals close or recycle connections as in
+                # the request handlers.
+                request_started.send(sender=self.__class__)
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                    cursor.fetchone()
+                if connection.vendor == "postgresql":
+                    backend_pids.add(connection.connection.get_backend_pid())
+                request_finished.send(sender=self.__class__)
+                latencies.append((time.perf_counter() - started) * 1000)
+        finally:
+            connection_created.disconnect(count)
+        return dict(
+            # Pooled connections are set up on every checkout.
+            connection_setups=len(connects),
+            server_connections=len(backend_pids) or None,
+            p50_ms=round(benchmark.percentile(latencies, 50), 3),
+            p95_ms=round(benchmark.percentile(latencies, 95), 3),
+            mean_ms=round(sum(latencies) / len(latencies), 3),
+        )
+
+    def print_report(self, report):
+        meta = report["meta"]
+        self.stdout.write(
+            f"{meta['engine']}: {meta['requests']} requests per profile"
+        )
+        columns = (
+            "connection_setups",
+            "server_connections",
+            "p50_ms",
+            "p95_ms",
+            "mean_ms",
+        )
+        self.stdout.write(
+            f"{'profile':20}" + "".join(f"{column:>19}" for column in columns)
+        )
+        for name, stats in report["profiles"].items():
+            self.stdout.write(
+                f"{name:20}"
+                + "".join(f"{stats[column]:>19}" for column in columns)
+            )
@@ -0,0 +1,229 @@
+import json
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from rest_framework.test import APIRequestFactory
+
+from api import benchmark
+from api.serializers import WriteRecipeSerializer
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+
+
+STATEMENTS = ("INSERT", "UPDATE", "DELETE")
+
+
+class ClearingWriteRecipeSerializer(WriteRecipeSerializer):
+    """The update that clears and re-creates every ingredient row."""
+
+    @transaction.atomic
+    def update(self, recipe, validated_data):
+        if "ingredients" in validated_data:
+            recipe.ingredients.clear()
+            self._save_ingredients(
+                recipe, validated_data.pop("ingredients")
+            )
+        return super(WriteRecipeSerializer, self).update(
+            recipe, validated_data
+        )
+
+
+STRATEGIES = {
+    "clear": ClearingWriteRecipeSerializer,
+    "diff": WriteRecipeSerializer,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the rows and statements that recipe updates write when "
+        "ingredients are cleared and re-created and when they are diffed"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ingredients", type=int, default=20)
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Updates per strategy and scenario",
+        )
+        parser.add_argument(
+            "--output", help="Write the JSON report to this file"
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with tempfile.TemporaryDirectory() as media_root:
+                with override_settings(MEDIA_ROOT=media_root):
+                    report = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        self.print_report(report)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump(report, file, indent=2)
+
+    def run(self, options):
+        user = benchmark.seed(
+            users=1,
+            recipes_per_user=1,
+            ingredients_per_recipe=options["ingredients"],
+            subscriptions_per_user=0,
+            favorites_per_user=0,
+            cart_per_user=0,
+            prefix=f"update-{int(time.time())}",
+        ).get()
+        recipe = Recipe.objects.get(author=user)
+        request = APIRequestFactory().patch("/")
+        request.user = user
+        initial = list(
+            recipe.recipeingredients.values_list("ingredient_id", "amount")
+        )
+        spare = Ingredient.objects.exclude(recipes=recipe).first()
+        tag_ids = list(Tag.objects.values_list("id", flat=True)[:3])
+        tags = tag_ids[:2]
+        base = dict(
+            ingredients=[
+                dict(id=ingredient_id, amount=amount)
+                for ingredient_id, amount in initial
+            ],
+            tags=tags,
+        )
+        scenarios = {
+            "unchanged": base,
+            "amount-changed": dict(
+                base,
+                ingredients=[
+                    dict(base["ingredients"][0], amount=initial[0][1] + 1),
+                    *base["ingredients"][1:],
+                ],
+            ),
+            "ingredient-added": dict(
+                base,
+                ingredients=[
+                    *base["ingredients"],
+                    dict(id=spare.id, amount=1),
+                ],
+            ),
+            "ingredient-removed": dict(
+                base, ingredients=base["ingredients"][1:]
+            ),
+            "tag-replaced": dict(base, tags=[tag_ids[0], tag_ids[-1]]),
+        }
+        results = {}
+        for scenario, data in scenarios.items():
+            for strategy, serializer_class in STRATEGIES.items():
+                samples = []
+                for _ in range(options["repeat"]):
+                    self.restore(recipe, initial, tags)
+                    samples.append(
+                        self.measure(recipe, serializer_class, data, request)
+                    )
+                results[f"{scenario}/{strategy}"] = dict(
+                    samples[0],
+                    p50_ms=round(
+                        benchmark.percentile(
+                            [sample.pop("ms") for sample in samples], 50
+                        ),
+                        3,
+                    ),
+                )
+        return dict(
+            meta=dict(
+                created=time.strftime("%Y-%m-%dT%H:%M:%S"),
+                vendor=connection.vendor,
+                ingredients=options["ingredients"],
+                repeat=options["repeat"],
+            ),
+            scenarios=results,
+        )
+
+    @staticmethod
+    def restore(recipe, ingredients, tags):
+        RecipeIngredient.objects.filter(recipe=recipe).delete()
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe, ingredient_id=ingredient_id, amount=amount
+            )
+            for ingredient_id, amount in ingredients
+        )
+        recipe.tags.set(tags)
+
+    @staticmethod
+    def snapshot(recipe):
+        """Amounts by ingredient row id and the ids of the tag rows."""
+        amounts = dict(recipe.recipeingredients.values_list("pk", "amount"))
+        links = set(
+            Recipe.tags.through.objects.filter(recipe=recipe).values_list(
+                "pk", flat=True
+            )
+        )
+        return amounts, links
+
+    def measure(self, recipe, serializer_class, data, request):
+        rows_before, links_before = self.snapshot(recipe)
+        serializer = serializer_class(
+            Recipe.objects.get(pk=recipe.pk),
+            data=data,
+            partial=True,
+            context=dict(request=request),
+        )
+        serializer.is_valid(raise_exception=True)
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            serializer.save()
+            elapsed = time.perf_counter() - started
+        rows_after, links_after = self.snapshot(recipe)
+        statements = {
+            kind.lower(): sum(
+                query["sql"].startswith(kind) for query in queries
+            )
+            for kind in STATEMENTS
+        }
+        return dict(
+            ms=elapsed * 1000,
+            queries=len(queries),
+            statements=statements,
+            rows=dict(
+                inserted=len(rows_after.keys() - rows_before.keys())
+                + len(links_after - links_before),
+                deleted=len(rows_before.keys() - rows_after.keys())
+                + len(links_before - links_after),
+                updated=sum(
+                    rows_before[pk] != amount
+                    for pk, amount in rows_after.items()
+                    if pk in rows_before
+                ),
+            ),
+        )
+
+    def print_report(self, report):
+        meta = report["meta"]
+        self.stdout.write(
+            f"{meta['vendor']}: recipe with {meta['ingredients']} "
+            f"ingredients, {meta['repeat']} updates per scenario"
+        )
+        self.stdout.write(
+            f"{'scenario':30}{'queries':>9}{'writes':>8}{'inserted':>10}"
+            f"{'deleted':>9}{'updated':>9}{'p50_ms':>10}"
+        )
+        for name, stats in report["scenarios"].items():
+            rows = stats["rows"]
+            self.stdout.write(
+                f"{name:30}{stats['queries']:>9}"
+                f"{sum(stats['statements'].values()):>8}"
+                f"{rows['inserted']:>10}{rows['deleted']:>9}"
+                f"{rows['updated']:>9}{stats['p50_ms']:>10}"
+            )
@@ -0,0 +1,141 @@
+import json
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+
+from api import benchmark
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the throughput of the favorite, shopping cart and "
+        "subscribe toggles of a running server that uses this database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            default="http://127.0.0.1:8000",
+            help="Base URL of the server to benchmark",
+        )
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=100,
+            help="Add/remove pairs per client and endpoint",
+        )
+        parser.add_argument(
+            "--output", help="Write the JSON report to this file"
+        )
+
+    def handle(self, *args, **options):
+        concurrency = options["concurrency"]
+        prefix = f"toggles-{int(time.time())}"
+        users = list(
+            benchmark.seed(
+                users=concurrency + 1,
+                recipes_per_user=1,
+                ingredients_per_recipe=1,
+                subscriptions_per_user=0,
+                favorites_per_user=0,
+                cart_per_user=0,
+                prefix=prefix,
+            )
+        )
+        try:
+            author, clients = users[0], users[1:]
+            recipe = Recipe.objects.filter(author=author).first()
+            tokens = [
+                Token.objects.get_or_create(user=user)[0].key
+                for user in clients
+            ]
+            paths = (
+                ("favorite", f"/api/recipes/{recipe.id}/favorite/"),
+                ("shopping-cart", f"/api/recipes/{recipe.id}/shopping_cart/"),
+                ("subscribe", f"/api/users/{author.id}/subscribe/"),
+            )
+            report = self.run(options, tokens, paths)
+        finally:
+            benchmark.User.objects.filter(
+                username__startswith=f"{prefix}-"
+            ).delete()
+        self.print_report(report)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump(report, file, indent=2)
+
+    def run(self, options, tokens, paths):
+        url = options["url"].rstrip("/")
+        samples = defaultdict(list)
+        lock = threading.Lock()
+
+        def client(token):
+            session = requests.Session()
+            session.headers["Authorization"] = f"Token {token}"
+            local = defaultdict(list)
+            for _ in range(options["requests"]):
+                for name, path in paths:
+                    for method, expected in (("post", 201), ("delete", 204)):
+                        started = time.perf_counter()
+                        response = session.request(method, url + path)
+                        elapsed = time.perf_counter() - started
+                        if response.status_code != expected:
+                            raise CommandError(
+                                f"{method.upper()} {path}: "
+                                f"{response.status_code} {response.text}"
+                            )
+                        local[name].append(elapsed * 1000)
+            with lock:
+                for name, latencies in local.items():
+                    samples[name].extend(latencies)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(tokens)) as executor:
+            for future in [
+                executor.submit(client, token) for token in tokens
+            ]:
+                future.result()
+        seconds = time.perf_counter() - started
+        total = sum(len(latencies) for latencies in samples.values())
+        return dict(
+            meta=dict(
+                url=url,
+                concurrency=len(tokens),
+                requests=total,
+                seconds=round(seconds, 3),
+                requests_per_second=round(total / seconds, 1),
+            ),
+            endpoints={
+                name: dict(
+                    requests=len(latencies),
+                    p50_ms=round(benchmark.percentile(latencies, 50), 3),
+                    p95_ms=round(benchmark.percentile(latencies, 95), 3),
+                    p99_ms=round(benchmark.percentile(latencies, 99), 3),
+                )
+                for name, latencies in samples.items()
+            },
+        )
+
+    def print_report(self, report):
+        meta = report["meta"]
+        self.stdout.write(
+            f"{meta['url']}: {meta['requests']} requests from "
+            f"{meta['concurrency']} clients in {meta['seconds']}s, "
+            f"{meta['requests_per_second']} req/s"
+        )
+        columns = ("p50_ms", "p95_ms", "p99_ms")
+        self.stdout.write(
+            f"{'endpoint':20}" + "".join(f"{column:>10}" for column in columns)
+        )
+        for name, stats in report["endpoints"].items():
+            self.stdout.write(
+                f"{name:20}"
+                + "".join(f"{stats[column]:>10}" for column in columns)
+            )
@@ -0,0 +1,58 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from api.query_plans import PlanChecker, get_queries
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Run EXPLAIN on the queries behind the API actions and fail if any "
+        "of them scans a large table sequentially"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--min-rows",
+            type=int,
+            default=10000,
+            help="Only report sequential scans of tables at least this big",
+        )
+        parser.add_argument(
+            "--user",
+            type=int,
+            help="Id of the user to run per-user queries for",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            checker = PlanChecker(options["min_rows"])
+        except ValueError as error:
+            raise CommandError(error)
+        user = (
+            User.objects.get(pk=options["user"])
+            if options["user"]
+            else User.objects.order_by("-subscriptions_count").first()
+        )
+        if user is None:
+            raise CommandError("No users to run the queries for")
+        failures = []
+        for name, queryset in get_queries(user).items():
+            plan, scans = checker.sequential_scans(queryset)
+            if scans:
+                failures.append(name)
+                scans = ", ".join(sorted(scans))
+                self.stdout.write(
+                    self.style.ERROR(f"{name}: sequential scan on {scans}")
+                )
+            else:
+                self.stdout.write(self.style.SUCCESS(f"{name}: OK"))
+            if options["verbosity"] > 1:
+                self.stdout.write(plan)
+        if failures:
+            raise CommandError(
+                f"Sequential scans in {len(failures)} queries: "
+                f"{', '.join(failures)}"
+            )
@@ -0,0 +1,8 @@
+from rest_framework.negotiation import DefaultContentNegotiation
+
+
+class IgnoreFormatContentNegotiation(DefaultContentNegotiation):
+    """Leave the ``format`` query parameter to the view itself."""
+
+    def filter_renderers(self, renderers, format):
+        return renderers
@@ -1,6 +1,14 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class LimitPageNumberPagination(PageNumberPagination):
     page_size_query_param = "limit"
     max_page_size = 6
+
+
+class RecipeCursorPagination(CursorPagination):
+    """Keyset pagination over (pub_date, id) without a COUNT query."""
+
+    page_size_query_param = "limit"
+    max_page_size = LimitPageNumberPagination.max_page_size
+    ordering = ("-pub_date", "-id")
@@ -0,0 +1,114 @@
+"""EXPLAIN checks of the queries behind the API actions.
+
+``check_query_plans`` runs them against a live database, and the tests
+against a seeded one, to catch queries that scan a table sequentially
+instead of using an index.
+"""
+import re
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.utils import timezone
+
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from recipes.search import search as search_recipes
+
+from . import exports, utils
+
+
+User = get_user_model()
+
+SEQ_SCAN_PATTERNS = {
+    "postgresql": re.compile(r"Seq Scan on (?P<table>\w+)"),
+    "sqlite": re.compile(
+        r"\bSCAN (?:TABLE )?(?P<table>\w+)"
+        r"(?!.*\b(?:USING\b.*\bINDEX|VIRTUAL TABLE INDEX)\b)"
+    ),
+}
+
+
+def get_queries(user):
+    """The querysets of the API actions by name, for ``user``."""
+    request = SimpleNamespace(user=user)
+    recipes = Recipe.objects.for_read(user)
+    recipe = Recipe.objects.only("id").first()
+    recipe_id = recipe.id if recipe else 0
+    tag = Tag.objects.only("slug").first()
+    authors = list(
+        User.objects.filter(authors__subscriber=user).only("id")[:6]
+    )
+    return {
+        "recipes-list": recipes[:6],
+        "recipes-list-cursor": recipes.order_by("-pub_date", "-id")
+        .filter(pub_date__lt=timezone.now())[:6],
+        "recipes-list-author": recipes.filter(author=user)[:6],
+        "recipes-list-tags": recipes.filter(
+            tags__slug=tag.slug if tag else ""
+        ).distinct()[:6],
+        "recipes-list-is_favorited": recipes.filter(is_favorited=True)[:6],
+        "recipes-list-is_in_shopping_cart": recipes.filter(
+            is_in_shopping_cart=True
+        )[:6],
+        "recipes-list-search": search_recipes(recipes, "суп").order_by(
+            "-search_rank", "-pub_date", "-id"
+        )[:6],
+        "recipes-detail": recipes.filter(pk=recipe_id),
+        "recipes-favorite": Favorite.objects.filter(
+            user=user, recipe_id=recipe_id
+        ),
+        "recipes-shopping-cart": ShoppingCart.objects.filter(
+            user=user, recipe_id=recipe_id
+        ),
+        "recipes-download-shopping-cart": (
+            exports.get_shopping_cart_rows(user)
+        ),
+        "users-list": utils.annotate_is_subscribed(
+            User.objects.all(), request
+        )[:6],
+        "users-subscriptions": utils.annotate_is_subscribed(
+            User.objects.filter(authors__subscriber=user), request
+        )[:6],
+        "users-subscriptions-recipes": utils.get_newest_recipes(
+            authors, limit=3
+        ).filter(author__in=authors),
+        "tags-slug": Tag.objects.filter(slug=tag.slug if tag else ""),
+        "ingredients-search": Ingredient.objects.filter(
+            name__istartswith="а"
+        ),
+    }
+
+
+class PlanChecker:
+    """Finds the sequential scans of tables with at least ``min_rows``."""
+
+    def __init__(self, min_rows):
+        pattern = SEQ_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            raise ValueError(
+                f"Unsupported database backend: {connection.vendor}"
+            )
+        self.pattern = pattern
+        self.min_rows = min_rows
+        self.tables = set(connection.introspection.table_names())
+        self.counts = {}
+
+    def count_rows(self, table):
+        if table not in self.counts:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT COUNT(*) FROM {connection.ops.quote_name(table)}"
+                )
+                self.counts[table] = cursor.fetchone()[0]
+        return self.counts[table]
+
+    def sequential_scans(self, queryset):
+        """The plan of ``queryset`` and the tables it scans sequentially."""
+        plan = queryset.explain()
+        return plan, {
+            table
+            for table in (
+                match.group("table") for match in self.pattern.finditer(plan)
+            )
+            if table in self.tables and self.count_rows(table) >= self.min_rows
+        }
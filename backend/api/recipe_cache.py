@@ -0,0 +1,136 @@
+"""Read-through cache of the user-independent recipe representation.
+
+A recipe is serialized once and stored without the fields that depend on
+the current user; those are overlaid on every response. The key includes
+the tag and ingredient catalog versions, so catalog edits never serve
+stale names, and a per-recipe version stamp that is dropped when the
+recipe or its author changes.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db.models import prefetch_related_objects
+
+from recipes import catalog
+from recipes.models import Recipe
+
+from . import replicas, utils
+from .serializers import ReadRecipeSerializer
+
+
+# Bump whenever ReadRecipeSerializer changes its output.
+SCHEMA_VERSION = 1
+USER_FIELDS = ("is_in_shopping_cart", "is_favorited")
+VERSION_KEY = "recipe_version:{}"
+CACHE_KEY = (
+    "recipe:{schema}:{tags}:{ingredients}:{base_url}:{id}:{version}"
+)
+
+
+def _get_versions(recipe_ids):
+    keys = {
+        recipe_id: VERSION_KEY.format(recipe_id) for recipe_id in recipe_ids
+    }
+    versions = caches["versions"].get_many(keys.values())
+    # A dropped stamp is replaced with a new one, never with an old value.
+    missing = {
+        key: time.time_ns() for key in keys.values() if key not in versions
+    }
+    if missing:
+        caches["versions"].set_many(missing, timeout=None)
+        versions.update(missing)
+    return {recipe_id: versions[key] for recipe_id, key in keys.items()}
+
+
+def _get_keys(recipes, request):
+    key = CACHE_KEY.format(
+        schema=SCHEMA_VERSION,
+        tags=catalog.get_version(catalog.TAGS),
+        ingredients=catalog.get_version(catalog.INGREDIENTS),
+        base_url=request.build_absolute_uri("/"),
+        id="{id}",
+        version="{version}",
+    )
+    versions = _get_versions([recipe.pk for recipe in recipes])
+    return [
+        key.format(id=recipe.pk, version=versions[recipe.pk])
+        for recipe in recipes
+    ], versions
+
+
+def _serialize(recipes, request):
+    prefetch_related_objects(recipes, "tags", "recipeingredients__ingredient")
+    representations = []
+    for data in ReadRecipeSerializer(
+        recipes, many=True, context={"request": request}
+    ).data:
+        data = dict(data)
+        for field in USER_FIELDS:
+            data.pop(field)
+        data["author"] = dict(data["author"])
+        data["author"].pop("is_subscribed")
+        representations.append(data)
+    return representations
+
+
+def represent(recipes, request, loaded_at):
+    """Representations of ``recipes`` as ReadRecipeSerializer renders them.
+
+    The recipes have to carry the ``with_user_flags`` annotations and the
+    author; tags and ingredients are only loaded for the cache misses.
+    ``loaded_at`` is the ``time.time_ns()`` taken before the recipes were
+    read from the database.
+    """
+    keys, versions = _get_keys(recipes, request)
+    cached = cache.get_many(keys)
+    missing = {
+        key: recipe
+        for recipe, key in zip(recipes, keys)
+        if key not in cached
+    }
+    if missing:
+        fresh = dict(
+            zip(missing, _serialize(list(missing.values()), request))
+        )
+        # A stamp created after the recipes were read may replace one that
+        # a write dropped in between, and a lagging replica may still return
+        # the recipe as it was before the write that dropped a young stamp:
+        # such representations are served but not stored.
+        oldest = loaded_at
+        if replicas.reading_replica():
+            oldest -= settings.REPLICA_STICKY_SECONDS * 10**9
+        stored = {
+            key: data
+            for (key, data), recipe in zip(fresh.items(), missing.values())
+            if versions[recipe.pk] < oldest
+        }
+        cache.set_many(stored, timeout=settings.RECIPE_CACHE_TIMEOUT)
+        cached.update(fresh)
+    subscribed_author_ids = utils.get_subscribed_author_ids(request)
+    representations = []
+    for recipe, key in zip(recipes, keys):
+        data = dict(cached[key])
+        data["author"] = dict(
+            data["author"],
+            is_subscribed=recipe.author_id in subscribed_author_ids,
+        )
+        for field in USER_FIELDS:
+            data[field] = getattr(recipe, field)
+        representations.append(data)
+    return representations
+
+
+def invalidate(recipe_ids):
+    """Drop the version stamps, and so the cached entries, of recipes."""
+    caches["versions"].delete_many(
+        [VERSION_KEY.format(pk) for pk in recipe_ids]
+    )
+
+
+def invalidate_author(author_id):
+    invalidate(
+        Recipe.objects.filter(author_id=author_id).values_list(
+            "id", flat=True
+        )
+    )
@@ -0,0 +1,89 @@
+"""Read replicas for the read-only API actions.
+
+Views with ``ReplicaReadMixin`` route the reads of their
+``replica_actions`` to a random alias of ``DATABASE_REPLICAS``; everything
+else, writes included, stays on ``default``. After a successful write
+``StickyWritesMiddleware`` keeps the user's reads on ``default`` for
+``REPLICA_STICKY_SECONDS``, which should cover the replication lag.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+
+STICKY_KEY = "replica_sticky:{}"
+
+_reading_replica = ContextVar("reading_replica", default=False)
+
+
+def reading_replica():
+    return _reading_replica.get()
+
+
+def stick_to_primary(user):
+    cache.set(
+        STICKY_KEY.format(user.pk),
+        True,
+        timeout=settings.REPLICA_STICKY_SECONDS,
+    )
+
+
+def is_sticky(user):
+    return user.is_authenticated and cache.get(STICKY_KEY.format(user.pk))
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if reading_replica():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return None
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaReadMixin:
+    replica_actions = ("list", "retrieve")
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Set after authentication, which reads from the primary.
+        self._replica_token = _reading_replica.set(
+            bool(settings.DATABASE_REPLICAS)
+            and self.action in self.replica_actions
+            and not is_sticky(request.user)
+        )
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, "_replica_token", None)
+        if token is not None:
+            _reading_replica.reset(token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class StickyWritesMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        # DRF sets the user it authenticated on the Django request too.
+        user = getattr(request, "user", None)
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and user is not None
+            and user.is_authenticated
+        ):
+            stick_to_primary(user)
+        return response
@@ -1,46 +1,57 @@
 from collections import Counter
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
 from django.db import transaction
 from djoser.serializers import UserSerializer as DjoserUserSerializer
-from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 
+from backend.middleware import TimedRepresentationMixin
 from recipes.models import (
     Error,
-    Favorite,
     Ingredient,
     MinValue,
     Recipe,
     RecipeIngredient,
-    ShoppingCart,
-    Subscription,
     Tag,
 )
 
+from . import utils
+from .fields import (
+    Base64ImageField,
+    BulkListField,
+    BulkPrimaryKeyRelatedField,
+    ImageVariantsField,
+)
+
 
 User = get_user_model()
 
 
-class UserSerializer(DjoserUserSerializer):
+class UserSerializer(TimedRepresentationMixin, DjoserUserSerializer):
     is_subscribed = serializers.SerializerMethodField()
+    avatar_variants = ImageVariantsField(source="avatar")
 
     class Meta:
         model = User
-        fields = (*DjoserUserSerializer.Meta.fields, "avatar", "is_subscribed")
+        fields = (
+            *DjoserUserSerializer.Meta.fields,
+            "avatar",
+            "avatar_variants",
+            "is_subscribed",
+        )
 
     def get_is_subscribed(self, author):
-        user = self.context.get("request").user
-        return (
-            user.is_authenticated
-            and Subscription.objects.filter(
-                author=author, subscriber=user
-            ).exists()
+        is_subscribed = getattr(author, "is_subscribed", None)
+        if is_subscribed is not None:
+            return is_subscribed
+        return author.id in utils.get_subscribed_author_ids(
+            self.context.get("request")
         )
 
 
-class AvatarSerializer(serializers.ModelSerializer):
+class AvatarSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     avatar = Base64ImageField()
 
     class Meta:
@@ -48,20 +59,22 @@ class AvatarSerializer(serializers.ModelSerializer):
         fields = ("avatar",)
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = "__all__"
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(
+    TimedRepresentationMixin, serializers.ModelSerializer
+):
     class Meta:
         model = Ingredient
         fields = "__all__"
 
 
 class RecipeIngredientSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(
+    id = BulkPrimaryKeyRelatedField(
         queryset=Ingredient.objects.all(), source="ingredient"
     )
     name = serializers.ReadOnlyField(source="ingredient.name")
@@ -81,14 +94,17 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
         fields = ("id", "name", "measurement_unit", "amount")
 
 
-class ReadRecipeSerializer(serializers.ModelSerializer):
+class ReadRecipeSerializer(
+    TimedRepresentationMixin, serializers.ModelSerializer
+):
     tags = TagSerializer(many=True)
     author = UserSerializer(read_only=True)
     ingredients = RecipeIngredientSerializer(
         source="recipeingredients", many=True
     )
-    is_in_shopping_cart = serializers.SerializerMethodField()
-    is_favorited = serializers.SerializerMethodField()
+    is_in_shopping_cart = serializers.BooleanField(read_only=True)
+    is_favorited = serializers.BooleanField(read_only=True)
+    image_variants = ImageVariantsField(source="image")
 
     class Meta:
         model = Recipe
@@ -99,6 +115,7 @@ class ReadRecipeSerializer(serializers.ModelSerializer):
             "ingredients",
             "name",
             "image",
+            "image_variants",
             "text",
             "cooking_time",
             "is_in_shopping_cart",
@@ -106,29 +123,15 @@ class ReadRecipeSerializer(serializers.ModelSerializer):
         )
         read_only_fields = fields
 
-    def get_is_in_shopping_cart(self, recipe):
-        user = self.context.get("request").user
-        return (
-            user.is_authenticated
-            and ShoppingCart.objects.filter(user=user, recipe=recipe).exists()
-        )
-
-    def get_is_favorited(self, recipe):
-        user = self.context.get("request").user
-        return (
-            user.is_authenticated
-            and Favorite.objects.filter(user=user, recipe=recipe).exists()
-        )
-
 
 class WriteRecipeSerializer(serializers.ModelSerializer):
-    ingredients = serializers.ListField(
+    ingredients = BulkListField(
         child=RecipeIngredientSerializer(),
         allow_empty=False,
         required=True,
     )
-    tags = serializers.ListField(
-        child=serializers.PrimaryKeyRelatedField(
+    tags = BulkListField(
+        child=BulkPrimaryKeyRelatedField(
             queryset=Tag.objects.all(),
         ),
         allow_empty=False,
@@ -190,21 +193,51 @@ class WriteRecipeSerializer(serializers.ModelSerializer):
         self._save_ingredients(recipe, ingredients_data)
         return recipe
 
+    def _update_ingredients(self, recipe, ingredients):
+        """Write only the rows that differ from ``ingredients``."""
+        current = {
+            item.ingredient_id: item
+            for item in recipe.recipeingredients.all()
+        }
+        changed = []
+        added = []
+        for ingredient in ingredients:
+            item = current.pop(ingredient["ingredient"].id, None)
+            if item is None:
+                added.append(ingredient)
+            elif item.amount != ingredient["amount"]:
+                item.amount = ingredient["amount"]
+                changed.append(item)
+        if current:
+            RecipeIngredient.objects.filter(
+                pk__in=[item.pk for item in current.values()]
+            ).delete()
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ("amount",))
+        if added:
+            self._save_ingredients(recipe, added)
+
     @transaction.atomic
     def update(self, recipe, validated_data):
-        try:
-            new_ingredients = validated_data.pop("ingredients")
-            recipe.ingredients.clear()
-            self._save_ingredients(recipe, new_ingredients)
-        except KeyError:
-            pass
+        if "ingredients" in validated_data:
+            self._update_ingredients(
+                recipe, validated_data.pop("ingredients")
+            )
+        # ModelSerializer.update assigns tags with set(), which already
+        # removes and adds only the difference.
         return super().update(recipe, validated_data)
 
     def to_representation(self, recipe):
+        recipe = Recipe.objects.for_read(
+            self.context.get("request").user
+        ).get(pk=recipe.pk)
         return ReadRecipeSerializer(recipe, context=self.context).data
 
 
-class ShortRecipeSerializer(serializers.ModelSerializer):
+class ShortRecipeSerializer(
+    TimedRepresentationMixin, serializers.ModelSerializer
+):
+    image_variants = ImageVariantsField(source="image")
 
     class Meta:
         model = Recipe
@@ -212,26 +245,24 @@ class ShortRecipeSerializer(serializers.ModelSerializer):
             "id",
             "name",
             "image",
+            "image_variants",
             "cooking_time",
         )
 
 
+class BulkRecipesSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.BULK_RECIPES_MAX,
+    )
+
+
 class ReadSubscriptionSerializer(UserSerializer):
-    recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.ReadOnlyField(source="recipes.count")
+    recipes = ShortRecipeSerializer(
+        source="newest_recipes", many=True, read_only=True
+    )
+    recipes_count = serializers.IntegerField(read_only=True)
 
     class Meta(UserSerializer.Meta):
         fields = (*UserSerializer.Meta.fields, "recipes", "recipes_count")
-
-    def get_recipes(self, user):
-        return ShortRecipeSerializer(
-            user.recipes.all()[
-                : int(
-                    self.context.get("request").GET.get(
-                        "recipes_limit", 10**10
-                    )
-                )
-            ],
-            context=self.context,
-            many=True,
-        ).data
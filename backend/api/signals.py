@@ -0,0 +1,89 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from recipes import thumbnails
+from recipes.models import Ingredient, Recipe, User
+
+from . import recipe_cache
+from .authentication import token_cache
+from .ingredient_index import ingredient_index
+
+
+# Registered after the catalog version receivers of the recipes app, so the
+# patched index adopts the freshly bumped version instead of rebuilding.
+
+@receiver(post_save, sender=Ingredient)
+def update_ingredient_index(sender, instance, **kwargs):
+    transaction.on_commit(lambda: ingredient_index.update(instance))
+
+
+@receiver(post_delete, sender=Ingredient)
+def remove_from_ingredient_index(sender, instance, **kwargs):
+    ingredient_id = instance.id
+    transaction.on_commit(lambda: ingredient_index.remove(ingredient_id))
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_recipe_cache(sender, instance, **kwargs):
+    recipe_id = instance.id
+    transaction.on_commit(lambda: recipe_cache.invalidate([recipe_id]))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_tagged_recipes_cache(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if not action.startswith("post_"):
+        return
+    recipe_ids = set(pk_set or ()) if reverse else {instance.id}
+    transaction.on_commit(lambda: recipe_cache.invalidate(recipe_ids))
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_recipes_cache(sender, instance, update_fields, **kwargs):
+    # Logins only touch last_login, which is not part of the representation.
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    author_id = instance.id
+    transaction.on_commit(lambda: recipe_cache.invalidate_author(author_id))
+
+
+@receiver(thumbnails.variants_generated, sender=Recipe)
+def invalidate_recipes_with_variants(sender, name, **kwargs):
+    # Their cached representations still point to the original image.
+    recipe_cache.invalidate(
+        Recipe.objects.filter(image=name).values_list("id", flat=True)
+    )
+
+
+@receiver(thumbnails.variants_generated, sender=User)
+def invalidate_recipes_of_authors_with_variants(sender, name, **kwargs):
+    for author_id in User.objects.filter(avatar=name).values_list(
+        "id", flat=True
+    ):
+        recipe_cache.invalidate_author(author_id)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    user_id, key = instance.user_id, instance.key
+    transaction.on_commit(lambda: token_cache.revoke(user_id, [key]))
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_user_tokens(sender, instance, update_fields, **kwargs):
+    # Covers deactivation and password changes along with profile edits.
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    user_id = instance.id
+    transaction.on_commit(
+        lambda: token_cache.revoke(
+            user_id,
+            Token.objects.filter(user_id=user_id).values_list(
+                "key", flat=True
+            ),
+        )
+    )
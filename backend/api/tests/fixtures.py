@@ -0,0 +1,68 @@
+import io
+import shutil
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe, User
+
+
+PASSWORD = "fixture-password"
+LOCAL_CACHES = {
+    alias: {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": f"tests-{alias}",
+    }
+    for alias in ("default", "versions")
+}
+
+
+def image_file(name="image.png"):
+    image = io.BytesIO()
+    Image.new("RGB", (8, 8), "orange").save(image, "PNG")
+    return SimpleUploadedFile(name, image.getvalue())
+
+
+def create_user(username, **fields):
+    return User.objects.create_user(
+        email=f"{username}@example.com",
+        username=username,
+        first_name=username.title(),
+        last_name=username.title(),
+        password=PASSWORD,
+        **fields,
+    )
+
+
+def create_recipe(author, name="Каша", tags=(), **fields):
+    recipe = Recipe.objects.create(
+        author=author,
+        name=name,
+        text=fields.pop("text", "Сварить"),
+        cooking_time=fields.pop("cooking_time", 10),
+        image=fields.pop("image", None) or image_file(),
+        **fields,
+    )
+    recipe.tags.set(tags)
+    return recipe
+
+
+def client_for(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+class TemporaryMediaMixin:
+    """Uploads go to a directory that is removed after every test."""
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media_settings = override_settings(MEDIA_ROOT=media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
@@ -0,0 +1,78 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.authentication import TokenUserCache
+
+from .fixtures import LOCAL_CACHES, PASSWORD, create_user
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class TokenRevocationTest(TestCase):
+    """Revoked tokens stop working in every process at once.
+
+    ``worker`` stands for the token cache of another process, which the
+    signals of this one never touch directly.
+    """
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.user = create_user("cook")
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.worker = TokenUserCache(max_size=100, ttl=60, shared=False)
+
+    def get_me(self):
+        with mock.patch("api.authentication.token_cache", self.worker):
+            return self.client.get("/api/users/me/")
+
+    def warm(self):
+        self.assertEqual(self.get_me().status_code, 200)
+        self.assertEqual(self.get_me().status_code, 200)
+        self.assertEqual(self.worker.hits, 1)
+
+    def test_logout(self):
+        self.warm()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/auth/token/logout/")
+        self.assertEqual(response.status_code, 204)
+        self.assertIsNone(self.worker.get(self.token.key))
+        self.assertEqual(self.get_me().status_code, 401)
+
+    def test_deactivation(self):
+        self.warm()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertIsNone(self.worker.get(self.token.key))
+        self.assertEqual(self.get_me().status_code, 401)
+
+    def test_password_change(self):
+        self.warm()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/users/set_password/",
+                data=dict(
+                    current_password=PASSWORD,
+                    new_password="another-Password-42",
+                ),
+            )
+        self.assertEqual(response.status_code, 204)
+        self.assertIsNone(self.worker.get(self.token.key))
+        # The token stays valid; the next lookup loads the new password.
+        self.assertEqual(self.get_me().status_code, 200)
+        user, _ = self.worker.get(self.token.key)
+        self.assertTrue(user.check_password("another-Password-42"))
+
+    def test_lookups_after_revocation_are_cached(self):
+        self.warm()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = "Шеф"
+            self.user.save()
+        self.assertEqual(self.get_me().json()["first_name"], "Шеф")
+        self.assertIsNotNone(self.worker.get(self.token.key))
@@ -0,0 +1,70 @@
+from django.test import TestCase
+
+from recipes.models import Recipe, User
+
+from .fixtures import (
+    TemporaryMediaMixin,
+    client_for,
+    create_recipe,
+    create_user,
+)
+
+
+class CountersTest(TemporaryMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = create_user("cook")
+        self.reader = client_for(create_user("guest"))
+        self.recipe = create_recipe(self.author)
+        self.favorite_url = f"/api/recipes/{self.recipe.id}/favorite/"
+
+    def favorites_count(self):
+        return Recipe.objects.get(pk=self.recipe.pk).favorites_count
+
+    def test_favorite_and_unfavorite(self):
+        self.assertEqual(self.reader.post(self.favorite_url).status_code, 201)
+        self.assertEqual(self.favorites_count(), 1)
+        self.assertEqual(self.reader.post(self.favorite_url).status_code, 400)
+        self.assertEqual(self.favorites_count(), 1)
+        self.assertEqual(
+            self.reader.delete(self.favorite_url).status_code, 204
+        )
+        self.assertEqual(self.favorites_count(), 0)
+
+    def test_recipe_patch_keeps_counters(self):
+        User.objects.filter(pk=self.author.pk).update(recipes_count=1)
+        self.reader.post(self.favorite_url)
+        response = client_for(self.author).patch(
+            f"/api/recipes/{self.recipe.id}/",
+            data=dict(name="Овсяная каша"),
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.favorites_count(), 1)
+        self.assertEqual(User.objects.get(pk=self.author.pk).recipes_count, 1)
+
+    def test_stale_instance_keeps_counters(self):
+        stale = Recipe.objects.get(pk=self.recipe.pk)
+        self.reader.post(self.favorite_url)
+        stale.name = "Овсяная каша"
+        stale.save()
+        self.assertEqual(self.favorites_count(), 1)
+
+    def test_deferred_instance_saves_loaded_fields(self):
+        self.reader.post(self.favorite_url)
+        recipe = Recipe.objects.only("name", "favorites_count").get(
+            pk=self.recipe.pk
+        )
+        recipe.favorites_count = 0
+        recipe.name = "Овсяная каша"
+        with self.assertNumQueries(1):
+            recipe.save()
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+        self.assertEqual(recipe.name, "Овсяная каша")
+        self.assertEqual(recipe.favorites_count, 1)
+
+    def test_save_of_deleted_row_inserts(self):
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+        Recipe.objects.filter(pk=self.recipe.pk).delete()
+        recipe.save()
+        self.assertTrue(Recipe.objects.filter(pk=self.recipe.pk).exists())
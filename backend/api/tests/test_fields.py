@@ -0,0 +1,48 @@
+import base64
+import io
+import os
+
+from django.test import SimpleTestCase
+from PIL import Image
+from rest_framework.exceptions import ValidationError
+
+from api.fields import DECODE_CHUNK_SIZE, Base64ImageField
+
+
+def png_base64(size=(200, 200)):
+    # Noise does not compress, so the image spans several decode chunks.
+    image = io.BytesIO()
+    Image.frombytes("RGB", size, os.urandom(size[0] * size[1] * 3)).save(
+        image, "PNG"
+    )
+    return base64.b64encode(image.getvalue()).decode()
+
+
+class Base64ImageFieldTest(SimpleTestCase):
+    def decode(self, data):
+        with Base64ImageField().to_internal_value(data) as file:
+            return Image.open(file).size
+
+    def test_spans_several_chunks(self):
+        self.assertGreater(len(png_base64()), 2 * DECODE_CHUNK_SIZE)
+
+    def test_plain(self):
+        self.assertEqual(self.decode(png_base64()), (200, 200))
+
+    def test_mime_lines(self):
+        encoded = png_base64()
+        for newline in ("\n", "\r\n"):
+            lines = newline.join(
+                encoded[offset:offset + 76]
+                for offset in range(0, len(encoded), 76)
+            )
+            self.assertEqual(
+                self.decode(f"data:image/png;base64,{lines}{newline}"),
+                (200, 200),
+            )
+
+    def test_invalid(self):
+        encoded = png_base64()
+        for data in (encoded[:-1], f"{encoded[:100]}!{encoded[100:]}"):
+            with self.assertRaises(ValidationError):
+                self.decode(data)
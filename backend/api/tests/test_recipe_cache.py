@@ -0,0 +1,179 @@
+from django.apps import apps
+from django.core.cache import caches
+from django.db import connections
+from django.db.models.signals import post_migrate
+from django.test import TestCase, override_settings
+
+from api import benchmark, recipe_cache
+from backend.cache import make_key
+from recipes import thumbnails
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+
+from .fixtures import (
+    LOCAL_CACHES,
+    TemporaryMediaMixin,
+    client_for,
+    create_recipe,
+    create_user,
+)
+
+
+@override_settings(
+    CACHES=LOCAL_CACHES, DATABASE_REPLICAS=[], RECIPE_CACHE=True
+)
+class RecipeCacheTest(TemporaryMediaMixin, TestCase):
+    """Reads after every kind of write see the write.
+
+    The invalidation runs on commit, which the test transactions never
+    reach, so the writes run inside ``captureOnCommitCallbacks``; the
+    reads stay on the primary, which alone sees the uncommitted rows.
+    """
+
+    def setUp(self):
+        super().setUp()
+        for cache in caches.all():
+            cache.clear()
+        self.author = create_user("cook")
+        self.reader = client_for(create_user("guest"))
+        self.breakfast = Tag.objects.create(name="Завтрак", slug="breakfast")
+        self.dinner = Tag.objects.create(name="Ужин", slug="dinner")
+        self.ingredient = Ingredient.objects.create(
+            name="Овсянка", measurement_unit="г"
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe = create_recipe(self.author, tags=[self.breakfast])
+            RecipeIngredient.objects.create(
+                recipe=self.recipe, ingredient=self.ingredient, amount=50
+            )
+
+    def read(self):
+        response = self.reader.get(f"/api/recipes/{self.recipe.id}/")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def warm(self):
+        """Read until the representation is cached, and check it is."""
+        # The first read after an invalidation is not stored.
+        self.read()
+        self.read()
+        Recipe.objects.filter(pk=self.recipe.pk).update(name="Без сигналов")
+        self.assertEqual(self.read()["name"], self.recipe.name)
+
+    def test_create(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client_for(self.author).post(
+                "/api/recipes/",
+                data=dict(
+                    name="Суп",
+                    text="Сварить",
+                    cooking_time=30,
+                    image=benchmark.image_base64(),
+                    tags=[self.dinner.id],
+                    ingredients=[dict(id=self.ingredient.id, amount=300)],
+                ),
+                format="json",
+            )
+        self.assertEqual(response.status_code, 201)
+        recipe_id = response.json()["id"]
+        for _ in range(3):
+            data = self.reader.get(f"/api/recipes/{recipe_id}/").json()
+            self.assertEqual(data["name"], "Суп")
+            self.assertEqual(data["author"]["id"], self.author.id)
+
+    def test_update(self):
+        self.warm()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client_for(self.author).patch(
+                f"/api/recipes/{self.recipe.id}/",
+                data=dict(
+                    name="Овсяная каша",
+                    tags=[self.breakfast.id],
+                    ingredients=[dict(id=self.ingredient.id, amount=70)],
+                ),
+                format="json",
+            )
+        self.assertEqual(response.status_code, 200)
+        data = self.read()
+        self.assertEqual(data["name"], "Овсяная каша")
+        self.assertEqual(data["ingredients"][0]["amount"], 70)
+
+    def test_author_rename(self):
+        self.warm()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.first_name = "Шеф"
+            self.author.save()
+        self.assertEqual(self.read()["author"]["first_name"], "Шеф")
+
+    def test_tags_changed(self):
+        self.warm()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe.tags.add(self.dinner)
+        self.assertEqual(
+            {tag["slug"] for tag in self.read()["tags"]},
+            {"breakfast", "dinner"},
+        )
+
+    def test_tags_changed_from_the_tag(self):
+        self.warm()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.breakfast.recipes.remove(self.recipe)
+        self.assertEqual(self.read()["tags"], [])
+
+    def test_catalog_rename(self):
+        self.warm()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.breakfast.name = "Ранний завтрак"
+            self.breakfast.save()
+        self.assertEqual(self.read()["tags"][0]["name"], "Ранний завтрак")
+
+    def test_delete(self):
+        self.warm()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe.delete()
+        response = self.reader.get(f"/api/recipes/{self.recipe.id}/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_generated_variants(self):
+        recipes = Recipe.objects.filter(pk=self.recipe.pk)
+        self.assertTrue(recipes.exclude(image_variants_name="").exists())
+        recipes.update(image_variants_name="")
+        recipe_cache.invalidate([self.recipe.pk])
+        self.warm()
+        self.assertNotIn("/variants/", self.read()["image_variants"]["card"])
+        thumbnails.record_variants(Recipe, "image", self.recipe.image.name)
+        self.assertIn("/variants/", self.read()["image_variants"]["card"])
+
+    def test_variants_of_missing_image(self):
+        thumbnails.delete_variants(self.recipe.image)
+        self.recipe.image.storage.delete(self.recipe.image.name)
+        with self.assertLogs("recipes.signals", "WARNING") as logs:
+            with self.captureOnCommitCallbacks(execute=True):
+                create_recipe(self.author, image=self.recipe.image.name)
+        [record] = logs.records
+        self.assertIsNone(record.exc_info)
+
+    def test_migrate_clears_caches(self):
+        self.warm()
+        Recipe.objects.filter(pk=self.recipe.pk).update(name="Из миграции")
+        config = apps.get_app_config("recipes")
+        post_migrate.send(
+            sender=config,
+            app_config=config,
+            verbosity=0,
+            interactive=False,
+            using="default",
+            apps=apps,
+            plan=[],
+        )
+        # The first read after clearing rebuilds the representation.
+        self.assertEqual(self.read()["name"], "Из миграции")
+
+    def test_keys_depend_on_database(self):
+        settings_dict = connections["default"].settings_dict
+        key = make_key("recipe_version:1", "", 1)
+        name = settings_dict["NAME"]
+        settings_dict["NAME"] = "another"
+        try:
+            self.assertNotEqual(make_key("recipe_version:1", "", 1), key)
+        finally:
+            settings_dict["NAME"] = name
@@ -0,0 +1,213 @@
+import io
+import shutil
+import tempfile
+import time
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.test import APIClient
+
+from api import recipe_cache, replicas
+from recipes.models import (
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    Subscription,
+    Tag,
+    User,
+)
+
+
+REPLICA = "replica_1"
+HAS_REPLICA = REPLICA in settings.DATABASES
+CACHES = {
+    alias: {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": f"replica-tests-{alias}",
+    }
+    for alias in ("default", "versions")
+}
+
+
+# The replica mirrors the test database. It has a connection of its own,
+# which only sees committed rows, hence TransactionTestCase.
+@skipUnless(HAS_REPLICA, "set a replica, e.g. SQLITE_REPLICAS=replica.sqlite3")
+@override_settings(
+    CACHES=CACHES,
+    DATABASE_REPLICAS=[REPLICA],
+    DATABASE_ROUTERS=["api.replicas.ReplicaRouter"],
+    REPLICA_STICKY_SECONDS=10,
+    RECIPE_CACHE=True,
+)
+class ReplicaRoutingTest(TransactionTestCase):
+    databases = {"default", REPLICA} if HAS_REPLICA else {"default"}
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media_settings = self.settings(MEDIA_ROOT=media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        image = io.BytesIO()
+        Image.new("RGB", (8, 8), "orange").save(image, "PNG")
+        self.user = User.objects.create_user(
+            email="cook@example.com",
+            username="cook",
+            first_name="Cook",
+            last_name="Cook",
+            password="cook-password",
+        )
+        self.other = User.objects.create_user(
+            email="guest@example.com",
+            username="guest",
+            first_name="Guest",
+            last_name="Guest",
+            password="guest-password",
+        )
+        self.tag = Tag.objects.create(name="Завтрак", slug="breakfast")
+        self.ingredient = Ingredient.objects.create(
+            name="Овсянка", measurement_unit="г"
+        )
+        self.recipe = Recipe.objects.create(
+            author=self.user,
+            name="Каша",
+            text="Сварить",
+            cooking_time=10,
+            image=SimpleUploadedFile("porridge.png", image.getvalue()),
+        )
+        self.recipe.tags.add(self.tag)
+        RecipeIngredient.objects.create(
+            recipe=self.recipe, ingredient=self.ingredient, amount=50
+        )
+        Subscription.objects.create(subscriber=self.other, author=self.user)
+        ShoppingCart.objects.create(user=self.other, recipe=self.recipe)
+        self.client = self.client_for(self.user)
+
+    @staticmethod
+    def client_for(user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def request(self, client, method, path, **kwargs):
+        """The response and the queries run on the primary and the replica."""
+        with CaptureQueriesContext(
+            connections["default"]
+        ) as primary, CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = getattr(client, method)(path, **kwargs)
+        return response, len(primary), len(replica)
+
+    def test_read_actions_use_replica(self):
+        client = self.client_for(self.other)
+        for path in (
+            "/api/recipes/",
+            f"/api/recipes/{self.recipe.id}/",
+            "/api/recipes/download_shopping_cart/",
+            "/api/tags/",
+            f"/api/tags/{self.tag.id}/",
+            "/api/ingredients/",
+            f"/api/ingredients/{self.ingredient.id}/",
+            "/api/users/",
+            f"/api/users/{self.user.id}/",
+            "/api/users/subscriptions/",
+        ):
+            with self.subTest(path):
+                response, _, replica = self.request(client, "get", path)
+                self.assertEqual(response.status_code, 200)
+                self.assertGreater(replica, 0)
+
+    def test_other_actions_use_primary(self):
+        for path in (
+            "/api/users/me/",
+            f"/api/recipes/{self.recipe.id}/get-link/",
+        ):
+            with self.subTest(path):
+                response, primary, replica = self.request(
+                    self.client, "get", path
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertGreater(primary, 0)
+                self.assertEqual(replica, 0)
+
+    def test_writes_use_primary(self):
+        response, primary, replica = self.request(
+            self.client,
+            "patch",
+            f"/api/recipes/{self.recipe.id}/",
+            data=dict(
+                name="Овсяная каша",
+                tags=[self.tag.id],
+                ingredients=[dict(id=self.ingredient.id, amount=60)],
+            ),
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+        self.assertEqual(
+            Recipe.objects.using("default").get(pk=self.recipe.pk).name,
+            "Овсяная каша",
+        )
+
+    def test_reads_stick_to_primary_after_write(self):
+        response = self.client.post(f"/api/recipes/{self.recipe.id}/favorite/")
+        self.assertEqual(response.status_code, 201)
+        _, primary, replica = self.request(self.client, "get", "/api/recipes/")
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+        # Other users keep reading from the replica.
+        _, _, replica = self.request(
+            self.client_for(self.other), "get", "/api/recipes/"
+        )
+        self.assertGreater(replica, 0)
+
+    def test_sticky_window_expires(self):
+        with override_settings(REPLICA_STICKY_SECONDS=1):
+            self.client.post(f"/api/recipes/{self.recipe.id}/favorite/")
+            self.assertTrue(replicas.is_sticky(self.user))
+            time.sleep(1.1)
+        self.assertFalse(replicas.is_sticky(self.user))
+        _, _, replica = self.request(self.client, "get", "/api/recipes/")
+        self.assertGreater(replica, 0)
+
+    def test_failed_write_does_not_stick(self):
+        response = self.client.post(
+            "/api/recipes/", data=dict(name=""), format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(replicas.is_sticky(self.user))
+
+    def stored_representations(self, client):
+        with mock.patch.object(
+            recipe_cache.cache,
+            "set_many",
+            wraps=recipe_cache.cache.set_many,
+        ) as set_many:
+            response = client.get(f"/api/recipes/{self.recipe.id}/")
+        self.assertEqual(response.status_code, 200)
+        return set_many.call_args.args[0]
+
+    def set_stamp_age(self, seconds):
+        recipe_cache.caches["versions"].set(
+            recipe_cache.VERSION_KEY.format(self.recipe.id),
+            time.time_ns() - seconds * 10**9,
+            timeout=None,
+        )
+
+    def test_replica_reads_skip_storing_young_stamps(self):
+        client = self.client_for(self.other)
+        self.set_stamp_age(5)
+        self.assertEqual(self.stored_representations(client), {})
+        self.set_stamp_age(60)
+        self.assertEqual(len(self.stored_representations(client)), 1)
+
+    def test_primary_reads_store_young_stamps(self):
+        self.client.post(f"/api/recipes/{self.recipe.id}/favorite/")
+        self.set_stamp_age(5)
+        self.assertEqual(len(self.stored_representations(self.client)), 1)
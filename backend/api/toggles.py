@@ -0,0 +1,133 @@
+"""Favorite, shopping cart and subscription toggles.
+
+Shared by the DRF actions and by their async counterparts in
+``api.async_views``. Every function returns the HTTP status and the data
+of the response, or raises a DRF exception.
+"""
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from rest_framework.exceptions import ValidationError
+
+from recipes import counters
+from recipes.models import Error, Recipe, Subscription
+
+from . import serializers, utils
+
+
+User = get_user_model()
+
+
+def _lock_user(user):
+    # Serializes the recipe toggles of a user, so the rows they read stay
+    # current until they write and every counter changes once per row.
+    list(
+        User.objects.select_for_update()
+        .filter(pk=user.pk)
+        .order_by()
+        .values("pk")
+    )
+
+
+@transaction.atomic
+def toggle_recipe(request, pk, model, error_message_add):
+    recipe = get_object_or_404(Recipe, pk=pk)
+    _lock_user(request.user)
+    if request.method == "DELETE":
+        item = get_object_or_404(model, recipe=recipe, user=request.user)
+        item.delete()
+        counters.removed(item)
+        return HTTPStatus.NO_CONTENT, None
+    item, created = model.objects.get_or_create(
+        user=request.user, recipe=recipe
+    )
+    if not created:
+        raise ValidationError(dict(error=error_message_add))
+    counters.added(item)
+    return (
+        HTTPStatus.CREATED,
+        serializers.ShortRecipeSerializer(recipe).data,
+    )
+
+
+@transaction.atomic
+def bulk_toggle_recipes(
+    request, recipe_ids, model, error_message_add, error_message_remove
+):
+    """Add or remove many recipes at once.
+
+    Every id gets the status the single-recipe toggle would answer with,
+    and an error message when nothing was done for it.
+    """
+    recipe_ids = list(dict.fromkeys(recipe_ids))
+    _lock_user(request.user)
+    found = set(
+        Recipe.objects.filter(pk__in=recipe_ids).values_list("pk", flat=True)
+    )
+    items = model.objects.filter(user=request.user, recipe_id__in=found)
+    present = set(items.values_list("recipe_id", flat=True))
+    if request.method == "DELETE":
+        changed, status, error_message = (
+            present,
+            HTTPStatus.NO_CONTENT,
+            error_message_remove,
+        )
+        if changed:
+            items.delete()
+            counters.adjust(model, dict(recipe=changed), -1)
+    else:
+        changed, status, error_message = (
+            found - present,
+            HTTPStatus.CREATED,
+            error_message_add,
+        )
+        model.objects.bulk_create(
+            (
+                model(user=request.user, recipe_id=recipe_id)
+                for recipe_id in changed
+            ),
+            ignore_conflicts=True,
+        )
+        counters.adjust(model, dict(recipe=changed), 1)
+    results = []
+    for recipe_id in recipe_ids:
+        if recipe_id not in found:
+            result = dict(
+                status=HTTPStatus.NOT_FOUND, error=Error.RECIPE_NOT_FOUND
+            )
+        elif recipe_id in changed:
+            result = dict(status=status)
+        else:
+            result = dict(status=HTTPStatus.BAD_REQUEST, error=error_message)
+        results.append(dict(id=recipe_id, **result))
+    return HTTPStatus.OK, dict(results=results)
+
+
+@transaction.atomic
+def toggle_subscription(request, id):
+    subscriber = request.user
+    author = get_object_or_404(User, pk=id)
+    if request.method == "DELETE":
+        subscription = get_object_or_404(
+            Subscription, author=author, subscriber=subscriber
+        )
+        subscription.delete()
+        counters.removed(subscription)
+        return HTTPStatus.NO_CONTENT, None
+    if subscriber == author:
+        raise ValidationError(dict(error=Error.CANNOT_SUBSCRIBE_TO_YOURSELF))
+    item, created = Subscription.objects.get_or_create(
+        author=author, subscriber=subscriber
+    )
+    if not created:
+        raise ValidationError(dict(error=Error.ALREADY_SUBSCRIBED))
+    counters.added(item)
+    utils.prefetch_newest_recipes([author], utils.get_recipes_limit(request))
+    return (
+        HTTPStatus.CREATED,
+        serializers.ReadSubscriptionSerializer(
+            author, context={"request": request}
+        ).data,
+    )
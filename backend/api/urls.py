@@ -1,7 +1,8 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import SimpleRouter
 
-from . import views
+from . import async_views, views
 
 
 app_name = "api"
@@ -34,7 +35,33 @@ router_v1.register(
 )
 
 
-urlpatterns = [
+urlpatterns = []
+
+if settings.ASYNC_TOGGLES:
+    urlpatterns += [
+        path(
+            "recipes/<int:pk>/favorite/",
+            async_views.favorite,
+            name="recipes-favorite",
+        ),
+        path(
+            "recipes/<int:pk>/shopping_cart/",
+            async_views.shopping_cart,
+            name="recipes-shopping-cart",
+        ),
+        path(
+            "users/<int:id>/subscribe/",
+            async_views.subscribe,
+            name="users-subscribe",
+        ),
+    ]
+
+urlpatterns += [
     path("", include(router_v1.urls)),
+    path(
+        "auth/token-cache/",
+        views.token_cache_stats,
+        name="token-cache-stats",
+    ),
     path("auth/", include("djoser.urls.authtoken")),
 ]
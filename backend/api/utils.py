@@ -1,29 +1,105 @@
-from django.utils import timezone
-
-
-TIME_FORMAT = "%d-%m-%Y %H:%M"
-
-
-def make_shopping_cart_file(ingredients, recipes):
-    current_time = timezone.now().strftime(TIME_FORMAT)
-    ingredients = [
-        f"{index}. {item['ingredient__name'].capitalize()} "
-        f"({item['ingredient__measurement_unit']}) - "
-        f"{item['amount']}"
-        for index, item in enumerate(ingredients, start=1)
-    ]
-    recipes = [
-        f"{index}. {recipe.name}"
-        for index, recipe in enumerate(recipes, start=1)
-    ]
-    return "\n".join(
-        [
-            f"Дата и время: {current_time}",
-            "",
-            "Список покупок:",
-            *ingredients,
-            "",
-            "Список рецептов:",
-            *recipes,
-        ]
+from django.db.models import (
+    BooleanField,
+    Exists,
+    F,
+    OuterRef,
+    Prefetch,
+    Value,
+    Window,
+    prefetch_related_objects,
+)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
+from rest_framework.exceptions import ValidationError
+
+from recipes.models import Error, Recipe, Subscription
+
+
+def get_subscribed_author_ids(request):
+    """Return ids of the authors followed by the current user.
+
+    The set is loaded with a single query and memoized on the request, so
+    every nested UserSerializer of one response shares it.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return frozenset()
+    if not hasattr(request, "_subscribed_author_ids"):
+        request._subscribed_author_ids = frozenset(
+            Subscription.objects.filter(subscriber=user).values_list(
+                "author_id", flat=True
+            )
+        )
+    return request._subscribed_author_ids
+
+
+def annotate_is_subscribed(users, request):
+    """Annotate a user queryset with the current user's is_subscribed flag."""
+    user = request.user
+    if not user.is_authenticated:
+        return users.annotate(
+            is_subscribed=Value(False, output_field=BooleanField())
+        )
+    return users.annotate(
+        is_subscribed=Exists(
+            Subscription.objects.filter(
+                subscriber=user, author=OuterRef("pk")
+            )
+        )
+    )
+
+
+def get_newest_recipes(authors, limit=None):
+    """Recipes of ``authors``, at most ``limit`` newest ones per author.
+
+    The top-N recipes per author are picked in one query by ranking them
+    with ``ROW_NUMBER() OVER (PARTITION BY author)``.
+    """
+    recipes = Recipe.objects.all()
+    if limit is None:
+        return recipes
+    ranked = (
+        Recipe.objects.filter(author__in=authors)
+        .annotate(
+            position=Window(
+                expression=RowNumber(),
+                partition_by=F("author_id"),
+                order_by=(F("pub_date").desc(), F("id").desc()),
+            )
+        )
+        .values("id", "position")
+    )
+    sql, params = ranked.query.sql_with_params()
+    return recipes.filter(
+        id__in=RawSQL(
+            f"SELECT id FROM ({sql}) ranked WHERE position <= %s",
+            (*params, limit),
+        )
+    )
+
+
+def prefetch_newest_recipes(authors, limit=None):
+    """Prefetch the newest recipes into ``author.newest_recipes``."""
+    prefetch_related_objects(
+        authors,
+        Prefetch(
+            "recipes",
+            queryset=get_newest_recipes(authors, limit),
+            to_attr="newest_recipes",
+        ),
     )
+    return authors
+
+
+def get_recipes_limit(request):
+    """Validated ``recipes_limit`` query parameter, None when it is absent."""
+    recipes_limit = request.query_params.get("recipes_limit")
+    if recipes_limit is None:
+        return None
+    try:
+        recipes_limit = int(recipes_limit)
+    except ValueError:
+        recipes_limit = -1
+    if recipes_limit < 0:
+        raise ValidationError(dict(recipes_limit=Error.INVALID_RECIPES_LIMIT))
+    return recipes_limit
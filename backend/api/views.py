@@ -1,35 +1,56 @@
+import time
 from http import HTTPStatus
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Sum
-from django.http import FileResponse
-from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet as DjoserUserViewSet
 from rest_framework import viewsets
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.exceptions import ValidationError
-from rest_framework.permissions import SAFE_METHODS, AllowAny, IsAuthenticated
+from rest_framework.permissions import (
+    SAFE_METHODS,
+    AllowAny,
+    IsAdminUser,
+    IsAuthenticated,
+)
 from rest_framework.response import Response
 
+from recipes import catalog, counters, thumbnails
 from recipes.models import (
     Error,
     Favorite,
     Ingredient,
     Recipe,
-    RecipeIngredient,
     ShoppingCart,
-    Subscription,
     Tag,
 )
 
-from . import filters, pagination, permissions, serializers, utils
+from . import (
+    exports,
+    filters,
+    pagination,
+    permissions,
+    recipe_cache,
+    replicas,
+    serializers,
+    toggles,
+    utils,
+)
+from .authentication import token_cache
+from .ingredient_index import ingredient_index
+from .negotiation import IgnoreFormatContentNegotiation
 
 
 User = get_user_model()
 
 
-class UserViewSet(DjoserUserViewSet):
+class UserViewSet(replicas.ReplicaReadMixin, DjoserUserViewSet):
+    replica_actions = ("list", "retrieve", "subscriptions")
+
     def get_permissions(self):
         if self.action == "me":
             return (IsAuthenticated(),)
@@ -37,6 +58,24 @@ class UserViewSet(DjoserUserViewSet):
             return (AllowAny(),)
         return super().get_permissions()
 
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # request.user may be a copy from the token cache that is up to
+        # TOKEN_CACHE_TTL old; the actions that save it need the stored row.
+        user = request.user
+        if request.method not in SAFE_METHODS and user.is_authenticated:
+            request.user = User.objects.get(pk=user.pk)
+
+    def get_instance(self):
+        # request.user may come from the token cache with stale counters.
+        return User.objects.get(pk=self.request.user.pk)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "list":
+            return utils.annotate_is_subscribed(queryset, self.request)
+        return queryset
+
     @action(
         detail=False,
         methods=("put", "delete"),
@@ -46,12 +85,15 @@ class UserViewSet(DjoserUserViewSet):
     def avatar(self, request):
         user = request.user
         if request.method == "DELETE":
-            user.avatar.delete(save=True)
+            if user.avatar:
+                thumbnails.delete_variants(user.avatar)
+            user.avatar.delete(save=False)
+            user.save(update_fields=["avatar"])
             return Response(status=HTTPStatus.NO_CONTENT)
         serializer = serializers.AvatarSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user.avatar = serializer.validated_data["avatar"]
-        user.save()
+        user.save(update_fields=["avatar"])
         return Response(
             serializers.AvatarSerializer(user).data,
             status=HTTPStatus.OK,
@@ -63,9 +105,15 @@ class UserViewSet(DjoserUserViewSet):
         pagination_class=pagination.LimitPageNumberPagination,
     )
     def subscriptions(self, request):
-        queryset = User.objects.filter(authors__subscriber=request.user)
+        queryset = utils.annotate_is_subscribed(
+            User.objects.filter(authors__subscriber=request.user), request
+        )
+        authors = self.paginate_queryset(queryset)
+        utils.prefetch_newest_recipes(
+            authors, utils.get_recipes_limit(request)
+        )
         serializer = serializers.ReadSubscriptionSerializer(
-            self.paginate_queryset(queryset),
+            authors,
             many=True,
             context={"request": request},
         )
@@ -79,38 +127,60 @@ class UserViewSet(DjoserUserViewSet):
         ),
     )
     def subscribe(self, request, id):
-        subscriber = request.user
-        author = get_object_or_404(User, pk=id)
-        if request.method == "DELETE":
-            get_object_or_404(
-                Subscription, author=author, subscriber=subscriber
-            ).delete()
-            return Response(status=HTTPStatus.NO_CONTENT)
-        if subscriber == author:
-            raise ValidationError(
-                dict(error=Error.CANNOT_SUBSCRIBE_TO_YOURSELF)
-            )
-        item, created = Subscription.objects.get_or_create(
-            author=author, subscriber=subscriber
+        status, data = toggles.toggle_subscription(request, id)
+        return Response(data, status=status)
+
+
+class ConditionalCatalogMixin:
+    """Revalidate a catalog with ETag/Last-Modified against its version.
+
+    ``If-None-Match``/``If-Modified-Since`` are checked before the handler
+    runs, so a 304 never touches the queryset.
+    """
+
+    catalog_name = None
+
+    def _conditional(self, handler, request, *args, **kwargs):
+        version = catalog.get_version(self.catalog_name)
+        etag = quote_etag(f"{self.catalog_name}-{version}")
+        last_modified = version // 10**9
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
         )
-        if not created:
-            raise ValidationError(dict(error=Error.ALREADY_SUBSCRIBED))
-        return Response(
-            serializers.ReadSubscriptionSerializer(
-                author, context={"request": request}
-            ).data,
-            status=HTTPStatus.CREATED,
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        patch_cache_control(
+            response, public=True, max_age=settings.CATALOG_CACHE_MAX_AGE
         )
+        return response
 
+    def list(self, request, *args, **kwargs):
+        return self._conditional(super().list, request, *args, **kwargs)
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(super().retrieve, request, *args, **kwargs)
+
+
+class TagViewSet(
+    replicas.ReplicaReadMixin,
+    ConditionalCatalogMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
+    catalog_name = catalog.TAGS
     queryset = Tag.objects.all()
     serializer_class = serializers.TagSerializer
     pagination_class = None
     permission_classes = (AllowAny,)
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(
+    replicas.ReplicaReadMixin,
+    ConditionalCatalogMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
+    catalog_name = catalog.INGREDIENTS
     queryset = Ingredient.objects.all()
     serializer_class = serializers.IngredientSerializer
     pagination_class = None
@@ -118,24 +188,85 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     search_fields = ("^name",)
     permission_classes = (AllowAny,)
 
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get(filters.IngredientFilter.search_param)
+        if not name or not settings.INGREDIENT_SEARCH_INDEX:
+            return super().list(request, *args, **kwargs)
+        return self._conditional(self._search_index, request, name)
 
-class RecipeViewSet(viewsets.ModelViewSet):
-    queryset = (
-        Recipe.objects.prefetch_related("tags", "ingredients")
-        .select_related("author")
-        .all()
-    )
+    def _search_index(self, request, name):
+        return Response(
+            self.get_serializer(
+                ingredient_index.search(
+                    name, limit=settings.INGREDIENT_SEARCH_LIMIT
+                ),
+                many=True,
+            ).data
+        )
+
+
+class RecipeViewSet(replicas.ReplicaReadMixin, viewsets.ModelViewSet):
+    replica_actions = ("list", "retrieve", "download_shopping_cart")
+    queryset = Recipe.objects.all()
     permission_classes = (permissions.IsAuthorOrReadOnly,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = filters.RecipeFilterSet
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in ("list", "retrieve"):
+            # The other actions look a recipe up only to check or change it;
+            # writes answer with a representation loaded afresh.
+            return queryset
+        if settings.RECIPE_CACHE:
+            # Tags and ingredients are loaded for the cache misses only.
+            return queryset.select_related("author").with_user_flags(
+                self.request.user
+            )
+        return queryset.for_read(self.request.user)
+
+    def list(self, request, *args, **kwargs):
+        if not settings.RECIPE_CACHE:
+            return super().list(request, *args, **kwargs)
+        recipes = self.filter_queryset(self.get_queryset())
+        loaded_at = time.time_ns()
+        page = self.paginate_queryset(recipes)
+        if page is None:
+            return Response(
+                recipe_cache.represent(list(recipes), request, loaded_at)
+            )
+        return self.get_paginated_response(
+            recipe_cache.represent(page, request, loaded_at)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        if not settings.RECIPE_CACHE:
+            return super().retrieve(request, *args, **kwargs)
+        loaded_at = time.time_ns()
+        return Response(
+            recipe_cache.represent([self.get_object()], request, loaded_at)[0]
+        )
+
+    @property
+    def paginator(self):
+        cursor_param = pagination.RecipeCursorPagination.cursor_query_param
+        if cursor_param in self.request.query_params:
+            self.pagination_class = pagination.RecipeCursorPagination
+        return super().paginator
+
     def get_serializer_class(self):
         if self.request.method in SAFE_METHODS:
             return serializers.ReadRecipeSerializer
         return serializers.WriteRecipeSerializer
 
+    @transaction.atomic
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        counters.added(serializer.save(author=self.request.user))
+
+    @transaction.atomic
+    def perform_destroy(self, recipe):
+        recipe.delete()
+        counters.removed(recipe)
 
     @action(detail=True, url_path="get-link")
     def get_link(self, request, pk=None):
@@ -148,29 +279,22 @@ class RecipeViewSet(viewsets.ModelViewSet):
             status=HTTPStatus.OK,
         )
 
-    @action(detail=False)
+    @action(
+        detail=False,
+        permission_classes=(IsAuthenticated,),
+        content_negotiation_class=IgnoreFormatContentNegotiation,
+    )
     def download_shopping_cart(self, request):
-        ingredients = (
-            RecipeIngredient.objects.filter(
-                recipe__shoppingcarts__user=request.user
-            )
-            .select_related("recipe", "ingredient")
-            .values(
-                "ingredient__name",
-                "ingredient__measurement_unit",
+        file_format = request.query_params.get("format", "txt")
+        if file_format not in exports.FORMATS:
+            raise ValidationError(
+                dict(
+                    format=Error.UNKNOWN_EXPORT_FORMAT.format(
+                        ", ".join(exports.FORMATS)
+                    )
+                )
             )
-            .annotate(amount=Sum("amount"))
-            .order_by("ingredient__name")
-        )
-        recipes = Recipe.objects.filter(
-            shoppingcarts__user=request.user
-        ).distinct()
-        return FileResponse(
-            utils.make_shopping_cart_file(ingredients, recipes),
-            as_attachment=True,
-            filename="shopping_cart.txt",
-            content_type="text/plain",
-        )
+        return exports.shopping_cart_response(request.user, file_format)
 
     @staticmethod
     def _favorite_shopping_cart_logic(
@@ -179,19 +303,10 @@ class RecipeViewSet(viewsets.ModelViewSet):
         pk,
         model,
     ):
-        recipe = get_object_or_404(Recipe, pk=pk)
-        if request.method == "DELETE":
-            get_object_or_404(model, recipe=recipe, user=request.user).delete()
-            return Response(status=HTTPStatus.NO_CONTENT)
-        item, created = model.objects.get_or_create(
-            user=request.user, recipe=recipe
-        )
-        if not created:
-            raise ValidationError(dict(error=error_message_add))
-        return Response(
-            serializers.ShortRecipeSerializer(recipe).data,
-            status=HTTPStatus.CREATED,
+        status, data = toggles.toggle_recipe(
+            request, pk, model, error_message_add
         )
+        return Response(data, status=status)
 
     @action(detail=True, methods=("POST", "DELETE"))
     def favorite(self, request, pk):
@@ -210,3 +325,51 @@ class RecipeViewSet(viewsets.ModelViewSet):
             pk=pk,
             model=ShoppingCart,
         )
+
+    @staticmethod
+    def _bulk_logic(request, model, error_message_add, error_message_remove):
+        serializer = serializers.BulkRecipesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        status, data = toggles.bulk_toggle_recipes(
+            request,
+            serializer.validated_data["recipes"],
+            model,
+            error_message_add,
+            error_message_remove,
+        )
+        return Response(data, status=status)
+
+    @action(
+        detail=False,
+        methods=("POST", "DELETE"),
+        url_path="favorite/bulk",
+        permission_classes=(IsAuthenticated,),
+    )
+    def favorite_bulk(self, request):
+        return self._bulk_logic(
+            request,
+            model=Favorite,
+            error_message_add=Error.ALREADY_FAVORITED,
+            error_message_remove=Error.NOT_FAVORITED,
+        )
+
+    @action(
+        detail=False,
+        methods=("POST", "DELETE"),
+        url_path="shopping_cart/bulk",
+        permission_classes=(IsAuthenticated,),
+    )
+    def shopping_cart_bulk(self, request):
+        return self._bulk_logic(
+            request,
+            model=ShoppingCart,
+            error_message_add=Error.ALREADY_IN_SHOPPING_CART,
+            error_message_remove=Error.NOT_IN_SHOPPING_CART,
+        )
+
+
+@api_view(("GET",))
+@permission_classes((IsAdminUser,))
+def token_cache_stats(request):
+    """Counters of the token cache of the process serving the request."""
+    return Response(token_cache.stats())
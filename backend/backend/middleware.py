@@ -0,0 +1,159 @@
+import json
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger("backend.timing")
+
+_timing = ContextVar("request_timing", default=None)
+
+
+class TimedRepresentationMixin:
+    """Counts ``to_representation`` as serialization of the timed request.
+
+    The hook of ``RequestTimingMiddleware`` into the API serializers; a
+    list serializer counts its items, and nested serializers count as part
+    of the outer one.
+    """
+
+    def to_representation(self, instance):
+        timing = _timing.get()
+        if timing is None:
+            return super().to_representation(instance)
+        with timing.serialization():
+            return super().to_representation(instance)
+
+
+class RequestTiming:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.serialization_seconds = 0.0
+        # Serializers may serialize others, as their fields or through .data.
+        self._serialization_depth = 0
+        self.view_finished = None
+        self.render_finished = None
+
+    def execute(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_seconds += time.perf_counter() - started
+
+    @contextmanager
+    def serialization(self):
+        """Count the time of the outermost serializer, SQL aside."""
+        self._serialization_depth += 1
+        started = time.perf_counter()
+        sql_seconds = self.sql_seconds
+        try:
+            yield
+        finally:
+            self._serialization_depth -= 1
+            if not self._serialization_depth:
+                self.serialization_seconds += (
+                    time.perf_counter()
+                    - started
+                    - (self.sql_seconds - sql_seconds)
+                )
+
+    def metrics(self):
+        """Durations of the request phases in milliseconds."""
+        finished = time.perf_counter()
+        view_finished = self.view_finished or finished
+        metrics = dict(
+            db=self.sql_seconds,
+            serialization=self.serialization_seconds,
+            app=(
+                view_finished
+                - self.started
+                - self.sql_seconds
+                - self.serialization_seconds
+            ),
+            render=(
+                self.render_finished - view_finished
+                if self.render_finished
+                else 0.0
+            ),
+            total=finished - self.started,
+        )
+        return {
+            name: round(seconds * 1000, 3)
+            for name, seconds in metrics.items()
+        }
+
+
+class RequestTimingMiddleware:
+    """Measure SQL, serialization, view and render time of every request.
+
+    Serialization is the time spent in the serializers with
+    ``TimedRepresentationMixin``, the API ones. Staff users get the numbers
+    in a ``Server-Timing`` header; requests slower than
+    ``REQUEST_TIMING_THRESHOLD_MS`` are logged as JSON.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timing = request.timing = RequestTiming()
+        token = _timing.set(timing)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(timing.execute)
+                    )
+                response = self.get_response(request)
+        finally:
+            _timing.reset(token)
+        metrics = timing.metrics()
+        user = getattr(request, "user", None)
+        if user is not None and user.is_staff:
+            response["Server-Timing"] = ", ".join(
+                (
+                    f'db;dur={metrics["db"]};desc="{timing.queries} queries"',
+                    f'serialization;dur={metrics["serialization"]}',
+                    f'app;dur={metrics["app"]};desc="View"',
+                    f'render;dur={metrics["render"]}',
+                    f'total;dur={metrics["total"]}',
+                )
+            )
+        if metrics["total"] >= settings.REQUEST_TIMING_THRESHOLD_MS:
+            logger.warning(
+                json.dumps(
+                    dict(
+                        event="slow_request",
+                        method=request.method,
+                        path=request.path,
+                        status=response.status_code,
+                        user=getattr(user, "pk", None),
+                        queries=timing.queries,
+                        **{
+                            f"{name}_ms": value
+                            for name, value in metrics.items()
+                        },
+                    )
+                )
+            )
+        return response
+
+    def process_template_response(self, request, response):
+        request.timing.view_finished = time.perf_counter()
+        response.add_post_render_callback(self._render_finished(request))
+        return response
+
+    @staticmethod
+    def _render_finished(request):
+        def callback(response):
+            request.timing.render_finished = time.perf_counter()
+
+        return callback
@@ -0,0 +1,109 @@
+"""PostgreSQL backend with connection health checks and an optional pool.
+
+``CONN_HEALTH_CHECKS`` makes a persistent connection answer ``SELECT 1``
+before its first use in every request, and replaces it when it is broken,
+as Django 4.1 does. ``POOL_SIZE`` keeps that many connections per process
+in a ``psycopg2`` pool: requests borrow one instead of connecting and give
+it back when Django closes it. A request that finds the pool exhausted
+gets a connection of its own.
+"""
+import logging
+import threading
+
+import psycopg2
+from django.db.backends.postgresql import base
+from psycopg2 import extras, pool
+
+
+logger = logging.getLogger(__name__)
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_done = False
+        self._pool = None
+
+    @property
+    def health_checks(self):
+        return self.settings_dict.get("CONN_HEALTH_CHECKS", False)
+
+    def _get_pool(self, conn_params):
+        size = self.settings_dict.get("POOL_SIZE", 0)
+        if not size:
+            return None
+        with _pools_lock:
+            if self.alias not in _pools:
+                _pools[self.alias] = pool.ThreadedConnectionPool(
+                    size, size, **conn_params
+                )
+            return _pools[self.alias]
+
+    def _checkout(self, connection_pool):
+        while True:
+            try:
+                connection = connection_pool.getconn()
+            except pool.PoolError:
+                logger.warning(
+                    "Connection pool of %s is exhausted", self.alias
+                )
+                return None
+            if not self.health_checks:
+                return connection
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                connection.rollback()
+                return connection
+            except psycopg2.Error:
+                connection_pool.putconn(connection, close=True)
+
+    def get_new_connection(self, conn_params):
+        connection_pool = self._get_pool(conn_params)
+        connection = connection_pool and self._checkout(connection_pool)
+        if not connection:
+            self._pool = None
+            return super().get_new_connection(conn_params)
+        self._pool = connection_pool
+        # The same setup as the parent class applies to a new connection.
+        options = self.settings_dict["OPTIONS"]
+        self.isolation_level = options.get(
+            "isolation_level", connection.isolation_level
+        )
+        if self.isolation_level != connection.isolation_level:
+            connection.set_session(isolation_level=self.isolation_level)
+        extras.register_default_jsonb(
+            conn_or_curs=connection, loads=lambda x: x
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is None or self._pool is None:
+            return super()._close()
+        connection_pool, self._pool = self._pool, None
+        with self.wrap_database_errors:
+            connection_pool.putconn(self.connection)
+
+    def connect(self):
+        # Before connecting: set_autocommit() ensures the new connection.
+        self.health_check_done = True
+        super().connect()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def ensure_connection(self):
+        if (
+            self.health_checks
+            and not self.health_check_done
+            and self.connection is not None
+            and not self.in_atomic_block
+        ):
+            self.health_check_done = True
+            if not self.is_usable():
+                self.close()
+        super().ensure_connection()
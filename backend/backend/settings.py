@@ -58,6 +58,25 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Opt-in per-request SQL/serialization/render timing, see backend.middleware
+REQUEST_TIMING = os.getenv("REQUEST_TIMING", "False") == "True"
+REQUEST_TIMING_THRESHOLD_MS = float(
+    os.getenv("REQUEST_TIMING_THRESHOLD_MS", 500)
+)
+if REQUEST_TIMING:
+    MIDDLEWARE.insert(0, "backend.middleware.RequestTimingMiddleware")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "backend.timing": {"handlers": ["console"], "level": "INFO"},
+    },
+}
+
 ROOT_URLCONF = "backend.urls"
 
 TEMPLATES = [
@@ -92,14 +111,98 @@ if os.getenv("USE_SQLITE", "True") == "True":
 else:
     DATABASES = {
         "default": {
-            "ENGINE": "django.db.backends.postgresql",
+            "ENGINE": "backend.postgresql",
             "NAME": os.getenv("POSTGRES_DB", ""),
             "USER": os.getenv("POSTGRES_USER", ""),
             "PASSWORD": os.getenv("POSTGRES_PASSWORD", ""),
             "HOST": os.getenv("POSTGRES_DB_HOST", "db"),
             "PORT": os.getenv("POSTGRES_DB_PORT", 5432),
+            # Persistent connections checked before their first use in a
+            # request, see backend.postgresql
+            "CONN_MAX_AGE": int(os.getenv("POSTGRES_CONN_MAX_AGE", 60)),
+            "CONN_HEALTH_CHECKS": (
+                os.getenv("POSTGRES_CONN_HEALTH_CHECKS", "True") == "True"
+            ),
+            # Connections kept in the pool of every worker process, one per
+            # thread serving requests; 0 disables the pool
+            "POOL_SIZE": int(os.getenv("POSTGRES_POOL_SIZE", 0)),
         }
     }
+    if DATABASES["default"]["POOL_SIZE"]:
+        # Requests return their pooled connection when they finish.
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+
+# Read replicas, see api.replicas: comma-separated "host[:port]" of
+# Postgres standbys, or SQLite files when USE_SQLITE is on (a copy of the
+# main database can stand in for a replica locally)
+if os.getenv("USE_SQLITE", "True") == "True":
+    REPLICA_SETTINGS = [
+        dict(NAME=name)
+        for name in os.getenv("SQLITE_REPLICAS", "").split(",")
+        if name
+    ]
+else:
+    REPLICA_SETTINGS = [
+        dict(zip(("HOST", "PORT"), host.split(":")))
+        for host in os.getenv("POSTGRES_REPLICA_HOSTS", "").split(",")
+        if host
+    ]
+DATABASE_REPLICAS = []
+for index, replica in enumerate(REPLICA_SETTINGS, start=1):
+    alias = f"replica_{index}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        **replica,
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", 10))
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ["api.replicas.ReplicaRouter"]
+    MIDDLEWARE.append("api.replicas.StickyWritesMiddleware")
+
+
+# The default LocMemCache keeps the caches in every process, which suits
+# development and single-process deployments (gunicorn runs one worker
+# unless told otherwise). Several processes or hosts need a shared cache,
+# e.g. memcached: CACHE_BACKEND set to
+# django.core.cache.backends.memcached.PyMemcacheCache and CACHE_LOCATION
+# to host:11211. Keys include the database, see backend.cache.
+CACHE_BACKEND = os.getenv(
+    "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+)
+CACHE_LOCATION = os.getenv("CACHE_LOCATION", "foodgram")
+SHARED_CACHE = not CACHE_BACKEND.endswith(
+    ("LocMemCache", "FileBasedCache", "DummyCache")
+)
+# Local caches need a location of their own for the stamps.
+CACHE_VERSIONS_LOCATION = os.getenv(
+    "CACHE_VERSIONS_LOCATION",
+    CACHE_LOCATION if SHARED_CACHE else f"{CACHE_LOCATION}_versions",
+)
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKEND,
+        "LOCATION": CACHE_LOCATION,
+        "KEY_FUNCTION": "backend.cache.make_key",
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("CACHE_MAX_ENTRIES", 10_000)),
+        },
+    },
+    # The catalog and recipe version stamps, apart from the entries they
+    # version so that culling those never drops a stamp.
+    "versions": {
+        "BACKEND": CACHE_BACKEND,
+        "LOCATION": CACHE_VERSIONS_LOCATION,
+        "KEY_PREFIX": "versions",
+        "KEY_FUNCTION": "backend.cache.make_key",
+        "OPTIONS": {
+            "MAX_ENTRIES": int(
+                os.getenv("CACHE_VERSIONS_MAX_ENTRIES", 1_000_000)
+            ),
+        },
+    },
+}
 
 
 # Password validation
@@ -155,7 +258,7 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "api.authentication.CachedTokenAuthentication",
     ],
     "DEFAULT_PAGINATION_CLASS": "api.pagination.LimitPageNumberPagination",
     "PAGE_SIZE": 6,
@@ -194,3 +297,48 @@ FORBIDDEN_USERNAMES = ("me",)
 
 AVATARS_PATH = "users/avatars"
 RECIPES_IMAGES_PATH = "recipes/images/"
+
+IMAGE_UPLOAD_MAX_BYTES = int(os.getenv("IMAGE_UPLOAD_MAX_BYTES", 10 * 2**20))
+IMAGE_UPLOAD_MAX_PIXELS = int(os.getenv("IMAGE_UPLOAD_MAX_PIXELS", 50_000_000))
+IMAGE_MAX_SIDE = int(os.getenv("IMAGE_MAX_SIDE", 1920))
+IMAGE_VARIANT_FORMAT = os.getenv("IMAGE_VARIANT_FORMAT", "WEBP")
+IMAGE_VARIANTS = {
+    "thumbnail": (200, 200),
+    "card": (640, 480),
+}
+
+INGREDIENT_SEARCH_INDEX = os.getenv("INGREDIENT_SEARCH_INDEX", "True") == "True"
+INGREDIENT_SEARCH_INDEX_TTL = int(os.getenv("INGREDIENT_SEARCH_INDEX_TTL", 300))
+INGREDIENT_SEARCH_LIMIT = int(os.getenv("INGREDIENT_SEARCH_LIMIT", 100))
+
+CATALOG_CACHE_MAX_AGE = int(os.getenv("CATALOG_CACHE_MAX_AGE", 0))
+
+# Serve the favorite, shopping cart and subscribe toggles with async views,
+# meant for the ASGI run profile, see README
+ASYNC_TOGGLES = os.getenv("ASYNC_TOGGLES", "False") == "True"
+
+# Off by default with a local cache: LocMemCache does not see the
+# invalidations of other processes, and FileBasedCache lists its directory
+# on every write
+RECIPE_CACHE = os.getenv("RECIPE_CACHE", str(SHARED_CACHE)) == "True"
+RECIPE_CACHE_TIMEOUT = int(os.getenv("RECIPE_CACHE_TIMEOUT", 24 * 60 * 60))
+
+# Per-process LRU of authentication tokens, see api.authentication;
+# TOKEN_CACHE_SHARED backs it with the default cache
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10_000))
+TOKEN_CACHE_TTL = int(os.getenv("TOKEN_CACHE_TTL", 60))
+TOKEN_CACHE_SHARED = os.getenv("TOKEN_CACHE_SHARED", "False") == "True"
+
+# Most recipes one bulk favorite or shopping cart request may change
+BULK_RECIPES_MAX = int(os.getenv("BULK_RECIPES_MAX", 100))
+
+ADMIN_EXACT_COUNT_LIMIT = int(os.getenv("ADMIN_EXACT_COUNT_LIMIT", 100_000))
+
+SHORT_LINK_PREFIX = "s/"
+# Frontend page that short links redirect to, formatted with the recipe id
+RECIPE_PAGE_URL = os.getenv("RECIPE_PAGE_URL", "/recipes/{}")
+SHORT_LINK_MAX_AGE = int(os.getenv("SHORT_LINK_MAX_AGE", 30 * 24 * 60 * 60))
+SHORT_LINK_MISS_MAX_AGE = int(os.getenv("SHORT_LINK_MISS_MAX_AGE", 60))
+SHORT_LINK_EXISTS_TIMEOUT = int(
+    os.getenv("SHORT_LINK_EXISTS_TIMEOUT", 24 * 60 * 60)
+)
@@ -7,7 +7,7 @@ from django.urls import include, path
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("api.urls")),
-    path("s/", include("recipes.urls")),
+    path(settings.SHORT_LINK_PREFIX, include("recipes.urls")),
 ]
 
 if settings.DEBUG:
@@ -7,6 +7,7 @@ from django.urls import reverse
 from django.utils.safestring import mark_safe
 from rest_framework.authtoken.models import TokenProxy
 
+from . import thumbnails
 from .models import (
     Favorite,
     Ingredient,
@@ -17,6 +18,7 @@ from .models import (
     Tag,
     User,
 )
+from .paginators import EstimatedCountPaginator
 
 
 admin.site.unregister(Group)
@@ -104,27 +106,7 @@ class UserAdmin(BaseUserAdmin):
     search_fields = ("username", "email", "first_name", "last_name")
     ordering = ("id",)
 
-    def get_queryset(self, request):
-        return (
-            super()
-            .get_queryset(request)
-            .prefetch_related("authors", "subscribers", "recipes")
-            .annotate(
-                subscribers_count=Count("authors", distinct=True),
-                subscriptions_count=Count("subscribers", distinct=True),
-                recipes_count=Count("recipes", distinct=True),
-            )
-        )
-
-    @admin.display(description="Подписчики")
-    def subscribers_count(self, user):
-        return user.subscribers_count
-
-    @admin.display(description="Подписки")
-    def subscriptions_count(self, user):
-        return user.subscriptions_count
-
-    @admin.display(description="Рецепты")
+    @admin.display(description="Рецепты", ordering="recipes_count")
     @mark_safe
     def recipes_count(self, user):
         if not user.recipes_count:
@@ -141,7 +123,8 @@ class UserAdmin(BaseUserAdmin):
         if not user.avatar:
             return "-"
         return (
-            f'<img src="{user.avatar.url}" width="100" height="100" '
+            f'<img src="{thumbnails.thumbnail_url(user.avatar)}" '
+            'width="100" height="100" '
             'style="object-fit: cover;" />'
         )
 
@@ -206,7 +189,8 @@ class ImageWidget(forms.ClearableFileInput):
         if value and hasattr(value, "url"):
             html = (
                 "<div>"
-                f'<img src="{value.url}" width="200" height="200" /><br>'
+                f'<img src="{thumbnails.thumbnail_url(value)}" '
+                'width="200" height="200" /><br>'
                 f"{html}"
                 "</div>"
             )
@@ -225,7 +209,7 @@ class RecipeForm(forms.ModelForm):
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
     form = RecipeForm
-    readonly_fields = ("count_in_favorite",)
+    readonly_fields = ("count_in_favorite", "in_carts_count")
     list_display = (
         "name",
         "author",
@@ -233,6 +217,7 @@ class RecipeAdmin(admin.ModelAdmin):
         "text",
         "cooking_time",
         "count_in_favorite",
+        "in_carts_count",
         "tags_list",
         "ingredients_list",
     )
@@ -242,21 +227,20 @@ class RecipeAdmin(admin.ModelAdmin):
     )
     search_fields = ("name", "tags__name", "ingredients__name")
     inlines = (RecipeIngredientInline,)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     def get_queryset(self, request):
         return (
             super()
             .get_queryset(request)
             .select_related("author")
-            .prefetch_related(
-                "tags", "ingredients", "recipeingredients__ingredient"
-            )
-            .annotate(count_in_favorite=Count("favorites"))
+            .prefetch_related("tags", "recipeingredients__ingredient")
         )
 
-    @admin.display(description="В избранном")
+    @admin.display(description="В избранном", ordering="favorites_count")
     def count_in_favorite(self, recipe):
-        return recipe.count_in_favorite
+        return recipe.favorites_count
 
     @admin.display(description="Изображение")
     @mark_safe
@@ -264,7 +248,8 @@ class RecipeAdmin(admin.ModelAdmin):
         if not recipe.image:
             return "-"
         return (
-            f'<img src="{recipe.image.url}" width="100" height="100" '
+            f'<img src="{thumbnails.thumbnail_url(recipe.image)}" '
+            'width="100" height="100" '
             'style="object-fit: cover;" />'
         )
 
@@ -275,9 +260,7 @@ class RecipeAdmin(admin.ModelAdmin):
             f"{recipe_ingredient.ingredient.name} "
             f"({recipe_ingredient.ingredient.measurement_unit}) - "
             f"{recipe_ingredient.amount}"
-            for recipe_ingredient in recipe.recipeingredients.select_related(
-                "ingredient"
-            )
+            for recipe_ingredient in recipe.recipeingredients.all()
         )
 
     @admin.display(description="Теги")
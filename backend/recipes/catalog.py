@@ -0,0 +1,27 @@
+"""Version stamps of the rarely changing tag and ingredient catalogs.
+
+A stamp is a nanosecond timestamp kept in the shared "versions" cache. It is
+bumped on every write to the catalog and lets clients revalidate their
+copy of the catalog with ETag/Last-Modified instead of re-downloading it.
+"""
+import time
+
+from django.core.cache import caches
+
+
+TAGS = "tags"
+INGREDIENTS = "ingredients"
+
+CACHE_KEY = "catalog_version:{}"
+
+
+def get_version(catalog):
+    return caches["versions"].get_or_set(
+        CACHE_KEY.format(catalog), time.time_ns, timeout=None
+    )
+
+
+def bump_version(catalog):
+    version = time.time_ns()
+    caches["versions"].set(CACHE_KEY.format(catalog), version, timeout=None)
+    return version
@@ -0,0 +1,101 @@
+"""Denormalized counters of users and recipes.
+
+Each counter is described by the model that stores it and by the model
+and foreign key of the rows it counts. The API views adjust the counters
+with ``F()`` updates in the same transaction as the counted rows, and the
+``recount`` command repairs whatever drifts through other write paths.
+"""
+from collections import namedtuple
+
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Favorite, Recipe, ShoppingCart, Subscription, User
+
+
+Counter = namedtuple("Counter", ("model", "field", "source", "foreign_key"))
+
+COUNTERS = (
+    Counter(User, "recipes_count", Recipe, "author"),
+    Counter(User, "subscribers_count", Subscription, "author"),
+    Counter(User, "subscriptions_count", Subscription, "subscriber"),
+    Counter(Recipe, "favorites_count", Favorite, "recipe"),
+    Counter(Recipe, "in_carts_count", ShoppingCart, "recipe"),
+)
+
+
+def adjust(source, ids, delta):
+    """Add ``delta`` to the counters of ``source`` rows pointing to ``ids``.
+
+    ``ids`` maps each foreign key of ``source`` to the ids of the objects
+    whose counters have to change.
+    """
+    for counter in COUNTERS:
+        if counter.source is source and ids.get(counter.foreign_key):
+            counter.model.objects.filter(
+                pk__in=ids[counter.foreign_key]
+            ).update(
+                **{counter.field: Greatest(F(counter.field) + delta, 0)}
+            )
+
+
+def added(instance):
+    adjust(type(instance), _foreign_keys(instance), 1)
+
+
+def removed(instance):
+    adjust(type(instance), _foreign_keys(instance), -1)
+
+
+def _foreign_keys(instance):
+    return {
+        counter.foreign_key: [
+            getattr(instance, f"{counter.foreign_key}_id")
+        ]
+        for counter in COUNTERS
+        if counter.source is type(instance)
+    }
+
+
+def actual_count(counter):
+    return Coalesce(
+        Subquery(
+            counter.source.objects.filter(
+                **{counter.foreign_key: OuterRef("pk")}
+            )
+            .order_by()
+            .values(counter.foreign_key)
+            .annotate(count=Count("pk"))
+            .values("count"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def recount(counter, chunk_size=1000):
+    """Fix the drifted values of one counter, ``chunk_size`` rows at a time.
+
+    Yields the number of fixed rows after every chunk.
+    """
+    queryset = counter.model.objects.order_by("pk")
+    last_pk = 0
+    while True:
+        pks = list(
+            queryset.filter(pk__gt=last_pk).values_list("pk", flat=True)[
+                :chunk_size
+            ]
+        )
+        if not pks:
+            return
+        chunk_last_pk = pks[-1]
+        with transaction.atomic():
+            fixed = (
+                queryset.filter(pk__gt=last_pk, pk__lte=chunk_last_pk)
+                .alias(actual=actual_count(counter))
+                .exclude(**{counter.field: F("actual")})
+                .update(**{counter.field: actual_count(counter)})
+            )
+        last_pk = chunk_last_pk
+        yield fixed
@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+
+from recipes import thumbnails
+from recipes.models import Recipe, User
+
+
+SOURCES = (
+    (Recipe, "image"),
+    (User, "avatar"),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the missing image variants of recipes and avatars "
+        "and record them, so the API serves their URLs"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenerate the variants that already exist",
+        )
+
+    def handle(self, *args, **options):
+        for model, field_name in SOURCES:
+            stats = dict(generated=0, skipped=0, missing=0, failed=0)
+            names = (
+                model.objects.exclude(**{field_name: ""})
+                .exclude(**{f"{field_name}__isnull": True})
+                .values_list(field_name, flat=True)
+                .distinct()
+                .iterator()
+            )
+            field = model._meta.get_field(field_name)
+            for name in names:
+                file = field.attr_class(None, field, name)
+                if not file.storage.exists(name):
+                    stats["missing"] += 1
+                    continue
+                if not options["force"] and thumbnails.has_variants(file):
+                    stats["skipped"] += 1
+                else:
+                    try:
+                        thumbnails.generate_variants(file)
+                    except (OSError, ValueError) as error:
+                        stats["failed"] += 1
+                        self.stderr.write(f"{name}: {error}")
+                        continue
+                    stats["generated"] += 1
+                # Also records the variants generated before the records.
+                thumbnails.record_variants(model, field_name, name)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{model._meta.verbose_name_plural}: "
+                    + ", ".join(
+                        f"{name} {count}" for name, count in stats.items()
+                    )
+                )
+            )
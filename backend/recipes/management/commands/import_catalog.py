@@ -0,0 +1,208 @@
+import csv
+import json
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes import catalog
+from recipes.models import Ingredient, Tag
+
+
+CATALOGS = {
+    catalog.INGREDIENTS: (
+        Ingredient,
+        ("name", "measurement_unit"),
+        settings.BASE_DIR / "data" / "ingredients.csv",
+    ),
+    catalog.TAGS: (
+        Tag,
+        ("slug",),
+        settings.BASE_DIR / "data" / "recipes_tag.csv",
+    ),
+}
+FORMATS = ("csv", "json", "ndjson")
+READ_SIZE = 64 * 1024
+
+
+def detect_format(path, file):
+    suffix = Path(path).suffix.lower().lstrip(".")
+    if suffix == "csv":
+        return "csv"
+    if suffix in ("ndjson", "jsonl"):
+        return "ndjson"
+    if suffix == "json":
+        head = file.read(READ_SIZE).lstrip()
+        file.seek(0)
+        return "json" if head.startswith("[") else "ndjson"
+    raise CommandError(f"Cannot detect the format of {path}, use --format")
+
+
+def iter_json_array(file):
+    """Yield the items of a top-level JSON array without loading it whole."""
+    decoder = json.JSONDecoder()
+    buffer = file.read(READ_SIZE).lstrip()
+    if not buffer.startswith("["):
+        raise CommandError("A JSON catalog must be an array of objects")
+    buffer = buffer[1:]
+    eof = False
+    while True:
+        buffer = buffer.lstrip().lstrip(",").lstrip()
+        if buffer.startswith("]"):
+            return
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if eof:
+                raise CommandError("Malformed JSON catalog")
+            chunk = file.read(READ_SIZE)
+            eof = not chunk
+            buffer += chunk
+            continue
+        if not isinstance(item, dict):
+            raise CommandError("A JSON catalog must be an array of objects")
+        yield item
+        buffer = buffer[end:]
+
+
+def iter_ndjson(file):
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+READERS = {
+    "csv": csv.DictReader,
+    "json": iter_json_array,
+    "ndjson": iter_ndjson,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream a tag or ingredient catalog from CSV, JSON or NDJSON into "
+        "the database in batches, optionally updating existing rows"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("catalog", choices=tuple(CATALOGS))
+        parser.add_argument(
+            "path", nargs="?", help="Defaults to the bundled data file"
+        )
+        parser.add_argument("--format", choices=FORMATS)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--key",
+            help=(
+                "Comma-separated natural key fields, defaults to slug for "
+                "tags and name,measurement_unit for ingredients"
+            ),
+        )
+        parser.add_argument(
+            "--upsert",
+            action="store_true",
+            help="Update the other fields of rows that already exist",
+        )
+
+    def handle(self, *args, **options):
+        model, key_fields, default_path = CATALOGS[options["catalog"]]
+        if options["key"]:
+            key_fields = tuple(options["key"].split(","))
+        fields = tuple(
+            field.name
+            for field in model._meta.concrete_fields
+            if not field.primary_key
+        )
+        unknown = set(key_fields) - set(fields)
+        if unknown:
+            raise CommandError(f"Unknown key fields: {', '.join(unknown)}")
+        self.model = model
+        self.key_fields = key_fields
+        self.fields = fields
+        self.update_fields = tuple(
+            field for field in fields if field not in key_fields
+        )
+        self.upsert = options["upsert"]
+        self.stats = dict(created=0, updated=0, unchanged=0, duplicates=0)
+        self.seen = set()
+        path = options["path"] or default_path
+        started = time.perf_counter()
+        rows = 0
+        with open(path, encoding="utf-8", newline="") as file:
+            file_format = options["format"] or detect_format(path, file)
+            items = READERS[file_format](file)
+            while True:
+                batch = list(islice(items, options["batch_size"]))
+                if not batch:
+                    break
+                self.import_batch(batch)
+                rows += len(batch)
+                seconds = time.perf_counter() - started
+                self.stdout.write(
+                    f"{rows} rows, {rows / seconds:.0f} rows/s", ending="\r"
+                )
+        catalog.bump_version(options["catalog"])
+        seconds = time.perf_counter() - started
+        stats = ", ".join(
+            f"{name} {count}" for name, count in self.stats.items()
+        )
+        self.stdout.write("")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {rows} rows in {seconds:.2f}s: {stats}"
+            )
+        )
+
+    def key(self, item):
+        try:
+            return tuple(item[field] for field in self.key_fields)
+        except KeyError as error:
+            raise CommandError(f"Row without {error}: {item}")
+
+    @transaction.atomic
+    def import_batch(self, batch):
+        items = {}
+        for raw in batch:
+            item = {field: raw[field] for field in self.fields if field in raw}
+            key = self.key(item)
+            if key in self.seen:
+                self.stats["duplicates"] += 1
+                continue
+            self.seen.add(key)
+            items[key] = item
+        first_key = self.key_fields[0]
+        existing = {
+            self.key(vars(instance)): instance
+            for instance in self.model.objects.filter(
+                **{
+                    f"{first_key}__in": {
+                        item[first_key] for item in items.values()
+                    }
+                }
+            )
+        }
+        created = []
+        updated = []
+        for key, item in items.items():
+            instance = existing.get(key)
+            if instance is None:
+                created.append(self.model(**item))
+            elif self.upsert and any(
+                getattr(instance, field) != item[field]
+                for field in self.update_fields
+                if field in item
+            ):
+                for field in self.update_fields:
+                    if field in item:
+                        setattr(instance, field, item[field])
+                updated.append(instance)
+            else:
+                self.stats["unchanged"] += 1
+        self.model.objects.bulk_create(created)
+        if updated:
+            self.model.objects.bulk_update(updated, self.update_fields)
+        self.stats["created"] += len(created)
+        self.stats["updated"] += len(updated)
@@ -1,18 +1,12 @@
-import json
-
+from django.conf import settings
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 
-from recipes.models import Tag
-
-PATH_JSON = 'data/recipes_tag.json'
+PATH_JSON = settings.BASE_DIR / 'data' / 'recipes_tag.json'
 
 
 class Command(BaseCommand):
     help = 'Import data from JSON file into the database'
 
     def handle(self, *args, **kwargs):
-        with open(PATH_JSON, 'r', encoding='utf-8') as file:
-            data = json.load(file)
-            Tag.objects.bulk_create((Tag(**tag) for tag in data),
-                                    ignore_conflicts=True)
-        self.stdout.write(self.style.SUCCESS('Data imported successfully'))
+        call_command('import_catalog', 'tags', PATH_JSON, stdout=self.stdout)
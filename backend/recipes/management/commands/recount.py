@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from recipes import counters
+
+
+class Command(BaseCommand):
+    help = "Repair the stored recipe, subscription and favorite counters"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        for counter in counters.COUNTERS:
+            fixed = 0
+            for chunk_fixed in counters.recount(
+                counter, chunk_size=options["chunk_size"]
+            ):
+                fixed += chunk_fixed
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{counter.model.__name__}.{counter.field}: "
+                    f"fixed {fixed}"
+                )
+            )
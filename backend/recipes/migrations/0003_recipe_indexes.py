@@ -0,0 +1,65 @@
+# Generated by Django 3.2.25 on 2026-10-17 05:57
+
+from django.db import migrations, models
+
+
+# Ingredient.name is searched with istartswith, which is compiled to
+# UPPER(name::text) LIKE UPPER('x%') on PostgreSQL and to a case-insensitive
+# LIKE on SQLite, so a plain index on the column is never used.
+PREFIX_INDEXES = {
+    'postgresql': (
+        (
+            'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+            None,
+        ),
+        (
+            'CREATE INDEX ingredient_name_upper_prefix_idx '
+            'ON recipes_ingredient (UPPER(name::text) text_pattern_ops)',
+            'DROP INDEX IF EXISTS ingredient_name_upper_prefix_idx',
+        ),
+        (
+            'CREATE INDEX ingredient_name_trgm_idx '
+            'ON recipes_ingredient USING gin (UPPER(name::text) gin_trgm_ops)',
+            'DROP INDEX IF EXISTS ingredient_name_trgm_idx',
+        ),
+    ),
+    'sqlite': (
+        (
+            'CREATE INDEX ingredient_name_nocase_idx '
+            'ON recipes_ingredient (name COLLATE NOCASE)',
+            'DROP INDEX IF EXISTS ingredient_name_nocase_idx',
+        ),
+    ),
+}
+
+
+def create_prefix_indexes(apps, schema_editor):
+    for sql, _ in PREFIX_INDEXES.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(sql)
+
+
+def drop_prefix_indexes(apps, schema_editor):
+    for _, sql in reversed(
+        PREFIX_INDEXES.get(schema_editor.connection.vendor, ())
+    ):
+        if sql:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_alter_recipeingredient_options'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-pub_date', '-id'], name='recipe_pub_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['author', '-pub_date'], name='recipe_author_pub_date_idx'),
+        ),
+        migrations.RunPython(create_prefix_indexes, drop_prefix_indexes),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 3.2.25 on 2026-10-17 06:06
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+COUNTERS = (
+    ('User', 'recipes_count', 'Recipe', 'author'),
+    ('User', 'subscribers_count', 'Subscription', 'author'),
+    ('User', 'subscriptions_count', 'Subscription', 'subscriber'),
+    ('Recipe', 'favorites_count', 'Favorite', 'recipe'),
+    ('Recipe', 'in_carts_count', 'ShoppingCart', 'recipe'),
+)
+
+
+def fill_counters(apps, schema_editor):
+    for model_name, field, source_name, foreign_key in COUNTERS:
+        source = apps.get_model('recipes', source_name)
+        apps.get_model('recipes', model_name).objects.update(
+            **{
+                field: Coalesce(
+                    Subquery(
+                        source.objects.filter(**{foreign_key: OuterRef('pk')})
+                        .order_by()
+                        .values(foreign_key)
+                        .annotate(count=Count('pk'))
+                        .values('count'),
+                        output_field=IntegerField(),
+                    ),
+                    0,
+                )
+            }
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_recipe_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В избранном'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='in_carts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В корзинах покупок'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='recipes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Рецепты'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='subscribers_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Подписчики'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='subscriptions_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Подписки'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,101 @@
+from django.db import migrations
+
+
+# The full-text search schema as of this migration, with the (forward,
+# backward) statements per vendor; recipes.search queries it.
+POSTGRES_VECTOR = (
+    "setweight(to_tsvector('russian', coalesce({row}name, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce({row}text, '')), 'B')"
+)
+SCHEMA = {
+    'postgresql': (
+        (
+            'ALTER TABLE recipes_recipe ADD COLUMN search_vector tsvector',
+            'ALTER TABLE recipes_recipe DROP COLUMN IF EXISTS search_vector',
+        ),
+        (
+            'CREATE FUNCTION recipes_recipe_search_vector() RETURNS trigger '
+            'AS $$ BEGIN NEW.search_vector := '
+            + POSTGRES_VECTOR.format(row='NEW.')
+            + '; RETURN NEW; END $$ LANGUAGE plpgsql',
+            'DROP FUNCTION IF EXISTS recipes_recipe_search_vector()',
+        ),
+        (
+            'CREATE TRIGGER recipes_recipe_search_vector '
+            'BEFORE INSERT OR UPDATE OF name, text ON recipes_recipe '
+            'FOR EACH ROW EXECUTE FUNCTION recipes_recipe_search_vector()',
+            'DROP TRIGGER IF EXISTS recipes_recipe_search_vector '
+            'ON recipes_recipe',
+        ),
+        (
+            'UPDATE recipes_recipe SET search_vector = '
+            + POSTGRES_VECTOR.format(row=''),
+            None,
+        ),
+        (
+            'CREATE INDEX recipe_search_vector_idx '
+            'ON recipes_recipe USING gin (search_vector)',
+            'DROP INDEX IF EXISTS recipe_search_vector_idx',
+        ),
+    ),
+    'sqlite': (
+        (
+            'CREATE VIRTUAL TABLE recipes_recipe_fts USING fts5('
+            "name, text, content='recipes_recipe', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2')",
+            'DROP TABLE IF EXISTS recipes_recipe_fts',
+        ),
+        (
+            'CREATE TRIGGER IF NOT EXISTS recipes_recipe_fts_insert '
+            'AFTER INSERT ON recipes_recipe BEGIN '
+            'INSERT INTO recipes_recipe_fts(rowid, name, text) '
+            'VALUES (new.id, new.name, new.text); END',
+            'DROP TRIGGER IF EXISTS recipes_recipe_fts_insert',
+        ),
+        (
+            'CREATE TRIGGER IF NOT EXISTS recipes_recipe_fts_delete '
+            'AFTER DELETE ON recipes_recipe BEGIN '
+            'INSERT INTO recipes_recipe_fts'
+            '(recipes_recipe_fts, rowid, name, text) '
+            "VALUES ('delete', old.id, old.name, old.text); END",
+            'DROP TRIGGER IF EXISTS recipes_recipe_fts_delete',
+        ),
+        (
+            'CREATE TRIGGER IF NOT EXISTS recipes_recipe_fts_update '
+            'AFTER UPDATE OF name, text ON recipes_recipe BEGIN '
+            'INSERT INTO recipes_recipe_fts'
+            '(recipes_recipe_fts, rowid, name, text) '
+            "VALUES ('delete', old.id, old.name, old.text); "
+            'INSERT INTO recipes_recipe_fts(rowid, name, text) '
+            'VALUES (new.id, new.name, new.text); END',
+            'DROP TRIGGER IF EXISTS recipes_recipe_fts_update',
+        ),
+        (
+            'INSERT INTO recipes_recipe_fts(recipes_recipe_fts) '
+            "VALUES ('rebuild')",
+            None,
+        ),
+    ),
+}
+
+
+def install_search(apps, schema_editor):
+    for sql, _ in SCHEMA.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(sql)
+
+
+def uninstall_search(apps, schema_editor):
+    for _, sql in reversed(SCHEMA.get(schema_editor.connection.vendor, ())):
+        if sql:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search, uninstall_search),
+    ]
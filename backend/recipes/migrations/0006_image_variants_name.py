@@ -0,0 +1,23 @@
+# Generated by Django 3.2.25 on 2026-10-17 06:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_recipe_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_variants_name',
+            field=models.CharField(blank=True, editable=False, max_length=100, verbose_name='Изображение с готовыми размерами'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='avatar_variants_name',
+            field=models.CharField(blank=True, editable=False, max_length=100, verbose_name='Изображение с готовыми размерами'),
+        ),
+    ]
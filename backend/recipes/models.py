@@ -2,9 +2,11 @@ from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models import BooleanField, Exists, OuterRef, Value
 from django.db.models.constraints import UniqueConstraint
 from django.urls import reverse
 
+from .shortlinks import encode
 from .validators import validate_username
 
 
@@ -38,6 +40,12 @@ class VerboseName:
     SUBSCRIPTION = "Подписка"
     USER = "Пользователь"
     RECIPE_INGREDIENT = "Продукт рецепта"
+    RECIPES_COUNT = "Рецепты"
+    SUBSCRIBERS_COUNT = "Подписчики"
+    SUBSCRIPTIONS_COUNT = "Подписки"
+    FAVORITES_COUNT = "В избранном"
+    IN_CARTS_COUNT = "В корзинах покупок"
+    VARIANTS_NAME = "Изображение с готовыми размерами"
 
 
 class VerboseNamePlural:
@@ -69,6 +77,7 @@ class Error:
     ALREADY_FAVORITED = "Рецепт уже есть в избранном"
     NOT_IN_SHOPPING_CART = "Рецепта нет в списке покупок"
     NOT_FAVORITED = "Рецепта нет в избранном"
+    RECIPE_NOT_FOUND = "Рецепт не найден"
     ALREADY_SUBSCRIBED = "Вы уже подписаны на этого автора"
     CANNOT_SUBSCRIBE_TO_YOURSELF = "Нельзя подписаться на самого себя"
     DUPLICATES = "Дубликаты: {}"
@@ -76,11 +85,62 @@ class Error:
     NOT_SUBSCRIBED = "Вы не подписаны на этого автора"
     NO_TAGS = "Нужен хотя бы один тег"
     NO_INGREDIENTS = "Рецепт не может обойтись без продуктов"
+    INVALID_RECIPES_LIMIT = "Ожидается неотрицательное целое число"
+    UNKNOWN_EXPORT_FORMAT = "Поддерживаемые форматы: {}"
+    INVALID_IMAGE = "Загрузите корректное изображение в base64"
+    IMAGE_TOO_LARGE = "Изображение больше {} байт"
+    IMAGE_TOO_MANY_PIXELS = "Изображение больше {} пикселей"
+    UNSUPPORTED_IMAGE_FORMAT = "Поддерживаемые форматы изображений: {}"
+
+
+class CountersMixin:
+    """Keeps the denormalized ``counter_fields`` out of ordinary saves.
+
+    Only ``F()`` updates and the ``recount`` command write the counters, so
+    the UPDATE of a save without ``update_fields`` leaves them out and an
+    instance loaded earlier never writes back stale values. Everything else
+    is Django's own save: a save that inserts, including the one that finds
+    its row gone, writes the counters as they are, and ``update_fields``
+    naming a counter writes it.
+    """
+
+    counter_fields = ()
+
+    def save(self, *args, update_fields=None, **kwargs):
+        deferred = self.get_deferred_fields()
+        if update_fields is None and deferred and not self._state.adding:
+            # Django would update all the loaded fields, counters included.
+            update_fields = [
+                field.attname
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in deferred
+                and field.name not in self.counter_fields
+            ]
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+    def _do_update(
+        self, base_qs, using, pk_val, values, update_fields, forced_update
+    ):
+        if update_fields is None:
+            values = [
+                value
+                for value in values
+                if value[0].name not in self.counter_fields
+            ]
+        return super()._do_update(
+            base_qs, using, pk_val, values, update_fields, forced_update
+        )
 
 
-class User(AbstractUser):
+class User(CountersMixin, AbstractUser):
 
     USERNAME_FIELD = "email"
+    counter_fields = (
+        "recipes_count",
+        "subscribers_count",
+        "subscriptions_count",
+    )
     REQUIRED_FIELDS = ["username", "first_name", "last_name"]
 
     email = models.EmailField(
@@ -106,6 +166,23 @@ class User(AbstractUser):
         blank=True,
         upload_to=settings.AVATARS_PATH,
     )
+    avatar_variants_name = models.CharField(
+        verbose_name=VerboseName.VARIANTS_NAME,
+        max_length=100,
+        blank=True,
+        editable=False,
+    )
+    recipes_count = models.PositiveIntegerField(
+        verbose_name=VerboseName.RECIPES_COUNT, default=0, editable=False
+    )
+    subscribers_count = models.PositiveIntegerField(
+        verbose_name=VerboseName.SUBSCRIBERS_COUNT, default=0, editable=False
+    )
+    subscriptions_count = models.PositiveIntegerField(
+        verbose_name=VerboseName.SUBSCRIPTIONS_COUNT,
+        default=0,
+        editable=False,
+    )
 
     class Meta(AbstractUser.Meta):
         verbose_name = VerboseName.USER
@@ -187,7 +264,31 @@ class Ingredient(models.Model):
         return f"{self.name} ({self.measurement_unit})"
 
 
-class Recipe(models.Model):
+class RecipeQuerySet(models.QuerySet):
+    def with_user_flags(self, user):
+        if not user.is_authenticated:
+            return self.annotate(
+                is_favorited=Value(False, output_field=BooleanField()),
+                is_in_shopping_cart=Value(False, output_field=BooleanField()),
+            )
+        return self.annotate(
+            is_favorited=Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef("pk"))
+            ),
+            is_in_shopping_cart=Exists(
+                ShoppingCart.objects.filter(user=user, recipe=OuterRef("pk"))
+            ),
+        )
+
+    def for_read(self, user):
+        return (
+            self.select_related("author")
+            .prefetch_related("tags", "recipeingredients__ingredient")
+            .with_user_flags(user)
+        )
+
+
+class Recipe(CountersMixin, models.Model):
     name = models.CharField(
         verbose_name=VerboseName.NAME,
         max_length=FieldLength.RECIPE_NAME,
@@ -205,6 +306,12 @@ class Recipe(models.Model):
         verbose_name=VerboseName.IMAGE,
         upload_to=settings.RECIPES_IMAGES_PATH,
     )
+    image_variants_name = models.CharField(
+        verbose_name=VerboseName.VARIANTS_NAME,
+        max_length=100,
+        blank=True,
+        editable=False,
+    )
     text = models.TextField(verbose_name=VerboseName.TEXT)
     cooking_time = models.PositiveIntegerField(
         verbose_name=VerboseName.COOKING_TIME,
@@ -218,18 +325,36 @@ class Recipe(models.Model):
     pub_date = models.DateTimeField(
         verbose_name=VerboseName.PUB_DATE, auto_now_add=True
     )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name=VerboseName.FAVORITES_COUNT, default=0, editable=False
+    )
+    in_carts_count = models.PositiveIntegerField(
+        verbose_name=VerboseName.IN_CARTS_COUNT, default=0, editable=False
+    )
+
+    objects = RecipeQuerySet.as_manager()
+    counter_fields = ("favorites_count", "in_carts_count")
 
     class Meta:
         verbose_name = VerboseName.RECIPE
         verbose_name_plural = VerboseNamePlural.RECIPES
         default_related_name = "%(class)ss"
         ordering = ("-pub_date",)
+        indexes = (
+            models.Index(
+                fields=("-pub_date", "-id"), name="recipe_pub_date_id_idx"
+            ),
+            models.Index(
+                fields=("author", "-pub_date"),
+                name="recipe_author_pub_date_idx",
+            ),
+        )
 
     def __str__(self):
         return self.name
 
     def get_absolute_url(self):
-        return reverse("recipes:short_link", args=[self.pk])
+        return reverse("recipes:short_link", args=[encode(self.pk)])
 
 
 class RecipeIngredient(models.Model):
@@ -0,0 +1,36 @@
+import json
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that trusts the planner's row estimate for big tables.
+
+    On PostgreSQL the number of rows is taken from ``EXPLAIN``; an exact
+    ``COUNT(*)`` is only run when the estimate is below
+    ``ADMIN_EXACT_COUNT_LIMIT``. Other backends always count exactly.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if connections[queryset.db].vendor == "postgresql":
+            estimate = self._estimate(queryset)
+            if estimate >= settings.ADMIN_EXACT_COUNT_LIMIT:
+                return estimate
+        return super().count
+
+    @staticmethod
+    def _estimate(queryset):
+        # QuerySet.explain() returns str() of the plan that psycopg2 has
+        # already parsed, which is not JSON; a raw cursor keeps the list.
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
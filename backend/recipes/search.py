@@ -0,0 +1,99 @@
+"""Full-text search over recipe names and descriptions.
+
+On PostgreSQL recipes carry a ``search_vector`` tsvector column that a
+trigger keeps in sync with the name and the text and a GIN index covers.
+On SQLite the ``recipes_recipe_fts`` FTS5 table mirrors the same columns
+through triggers. Neither is a model field: migration 0005 creates them,
+and other backends fall back to ``icontains``.
+"""
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+
+# Text search configuration of the queries, the one the trigger of
+# migration 0005 indexes with.
+POSTGRES_CONFIG = "russian"
+POSTGRES_QUERY = f"websearch_to_tsquery('{POSTGRES_CONFIG}', %s)"
+
+# SQLite drops the triggers of a table that a migration rebuilds, so they
+# are also recreated after every migrate.
+SQLITE_TRIGGERS = {
+    "recipes_recipe_fts_insert": (
+        "AFTER INSERT ON recipes_recipe BEGIN "
+        "INSERT INTO recipes_recipe_fts(rowid, name, text) "
+        "VALUES (new.id, new.name, new.text); END"
+    ),
+    "recipes_recipe_fts_delete": (
+        "AFTER DELETE ON recipes_recipe BEGIN "
+        "INSERT INTO recipes_recipe_fts"
+        "(recipes_recipe_fts, rowid, name, text) "
+        "VALUES ('delete', old.id, old.name, old.text); END"
+    ),
+    "recipes_recipe_fts_update": (
+        "AFTER UPDATE OF name, text ON recipes_recipe BEGIN "
+        "INSERT INTO recipes_recipe_fts"
+        "(recipes_recipe_fts, rowid, name, text) "
+        "VALUES ('delete', old.id, old.name, old.text); "
+        "INSERT INTO recipes_recipe_fts(rowid, name, text) "
+        "VALUES (new.id, new.name, new.text); END"
+    ),
+}
+WORD = re.compile(r"\w+")
+
+
+def install_triggers(connection):
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            for name, sql in SQLITE_TRIGGERS.items():
+                cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {sql}")
+
+
+def search(recipes, query):
+    """Recipes matching ``query``, annotated with ``search_rank``.
+
+    A higher rank means a better match; the name weighs more than the text.
+    """
+    vendor = connections[recipes.db].vendor
+    if vendor == "postgresql":
+        return recipes.alias(
+            search_match=RawSQL(
+                f'"recipes_recipe"."search_vector" @@ {POSTGRES_QUERY}',
+                (query,),
+                output_field=BooleanField(),
+            )
+        ).filter(search_match=True).annotate(
+            search_rank=RawSQL(
+                'ts_rank("recipes_recipe"."search_vector", '
+                f"{POSTGRES_QUERY})",
+                (query,),
+                output_field=FloatField(),
+            )
+        )
+    if vendor == "sqlite":
+        words = WORD.findall(query)
+        if not words:
+            return recipes.annotate(
+                search_rank=Value(0.0, output_field=FloatField())
+            ).none()
+        match = " ".join(f'"{word}"*' for word in words)
+        return recipes.filter(
+            id__in=RawSQL(
+                "SELECT rowid FROM recipes_recipe_fts "
+                "WHERE recipes_recipe_fts MATCH %s",
+                (match,),
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                "SELECT -bm25(recipes_recipe_fts, 10.0, 1.0) "
+                "FROM recipes_recipe_fts WHERE recipes_recipe_fts MATCH %s "
+                'AND rowid = "recipes_recipe"."id"',
+                (match,),
+                output_field=FloatField(),
+            )
+        )
+    return recipes.filter(
+        Q(name__icontains=query) | Q(text__icontains=query)
+    ).annotate(search_rank=Value(0.0, output_field=FloatField()))
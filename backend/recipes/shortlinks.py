@@ -0,0 +1,141 @@
+"""Short recipe links.
+
+A recipe id is scrambled by a multiplication modulo ``62 ** CODE_LENGTH``
+and written in base62, so links are compact, fixed-length and do not
+reveal how many recipes there are. Decoding is pure arithmetic; only the
+existence of the recipe is checked, through the cache.
+
+``wsgi`` and ``asgi`` wrap the project applications so that short links are
+answered before Django's request handling and middleware. They still send
+the request signals, which close obsolete database connections and the
+cache connections as Django's handlers do.
+"""
+import re
+import string
+from http import HTTPStatus
+
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import request_finished, request_started
+
+
+ALPHABET = string.digits + string.ascii_letters
+CODE_LENGTH = 7
+MODULUS = len(ALPHABET) ** CODE_LENGTH
+# Coprime with the modulus, so the scrambling is a bijection.
+MULTIPLIER = 2_654_435_761
+INVERSE = pow(MULTIPLIER, -1, MODULUS)
+INDEXES = {character: index for index, character in enumerate(ALPHABET)}
+
+EXISTS_KEY = "recipe_exists:{}"
+PATH = re.compile(
+    rf"^/{re.escape(settings.SHORT_LINK_PREFIX)}([0-9A-Za-z]+)/?$"
+)
+SAFE_METHODS = ("GET", "HEAD")
+
+
+def encode(recipe_id):
+    number = recipe_id * MULTIPLIER % MODULUS
+    characters = []
+    for _ in range(CODE_LENGTH):
+        number, index = divmod(number, len(ALPHABET))
+        characters.append(ALPHABET[index])
+    return "".join(reversed(characters))
+
+
+def decode(code):
+    """Recipe id of a short code, None for malformed codes."""
+    if len(code) != CODE_LENGTH:
+        return None
+    number = 0
+    for character in code:
+        index = INDEXES.get(character)
+        if index is None:
+            return None
+        number = number * len(ALPHABET) + index
+    return number * INVERSE % MODULUS or None
+
+
+def recipe_exists(recipe_id):
+    key = EXISTS_KEY.format(recipe_id)
+    exists = cache.get(key)
+    if exists is None:
+        # models imports this module for Recipe.get_absolute_url.
+        recipe_model = apps.get_model("recipes", "Recipe")
+        exists = recipe_model.objects.filter(pk=recipe_id).exists()
+        cache.set(key, exists, timeout=settings.SHORT_LINK_EXISTS_TIMEOUT)
+    return exists
+
+
+def set_recipe_exists(recipe_id, exists):
+    cache.set(
+        EXISTS_KEY.format(recipe_id),
+        exists,
+        timeout=settings.SHORT_LINK_EXISTS_TIMEOUT,
+    )
+
+
+def resolve(code):
+    """Status and headers of the response to a short link."""
+    recipe_id = decode(code)
+    if recipe_id is None or not recipe_exists(recipe_id):
+        return HTTPStatus.NOT_FOUND, {
+            "Cache-Control": (
+                f"public, max-age={settings.SHORT_LINK_MISS_MAX_AGE}"
+            ),
+        }
+    return HTTPStatus.MOVED_PERMANENTLY, {
+        "Location": settings.RECIPE_PAGE_URL.format(recipe_id),
+        "Cache-Control": f"public, max-age={settings.SHORT_LINK_MAX_AGE}",
+    }
+
+
+def _handle(code):
+    request_started.send(sender=__name__)
+    try:
+        return resolve(code)
+    finally:
+        request_finished.send(sender=__name__)
+
+
+def wsgi(application):
+    def handler(environ, start_response):
+        match = PATH.match(environ.get("PATH_INFO", ""))
+        if not match or environ["REQUEST_METHOD"] not in SAFE_METHODS:
+            return application(environ, start_response)
+        status, headers = _handle(match[1])
+        start_response(
+            f"{status.value} {status.phrase}",
+            [*headers.items(), ("Content-Length", "0")],
+        )
+        return [b""]
+
+    return handler
+
+
+def asgi(application):
+    async def handler(scope, receive, send):
+        match = scope["type"] == "http" and PATH.match(scope["path"])
+        if not match or scope["method"] not in SAFE_METHODS:
+            return await application(scope, receive, send)
+        status, headers = await sync_to_async(
+            _handle, thread_sensitive=False
+        )(match[1])
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status.value,
+                "headers": [
+                    (header.encode("latin-1"), value.encode("latin-1"))
+                    for header, value in (
+                        *headers.items(),
+                        ("Content-Length", "0"),
+                    )
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": b""})
+
+    return handler
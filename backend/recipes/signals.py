@@ -0,0 +1,101 @@
+import logging
+
+from django.core.cache import caches
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from . import catalog, search, shortlinks, thumbnails
+from .models import Ingredient, Recipe, Tag, User
+
+
+logger = logging.getLogger(__name__)
+
+CATALOGS = {
+    Tag: catalog.TAGS,
+    Ingredient: catalog.INGREDIENTS,
+}
+IMAGE_FIELDS = {
+    Recipe: "image",
+    User: "avatar",
+}
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def bump_catalog_version(sender, **kwargs):
+    transaction.on_commit(lambda: catalog.bump_version(CATALOGS[sender]))
+
+
+def _generate_variants(model, field_name, file):
+    # Variants may exist already if a stale instance cleared the record.
+    if not thumbnails.has_variants(file):
+        try:
+            thumbnails.generate_variants(file)
+        except FileNotFoundError:
+            logger.warning("Cannot generate variants of missing %s", file.name)
+            return
+        except (OSError, ValueError) as error:
+            logger.warning(
+                "Cannot generate variants of %s: %s", file.name, error
+            )
+            return
+    thumbnails.record_variants(model, field_name, file.name)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=User)
+def generate_image_variants(sender, instance, update_fields=None, **kwargs):
+    field_name = IMAGE_FIELDS[sender]
+    if update_fields is not None and field_name not in update_fields:
+        return
+    file = getattr(instance, field_name)
+    if file and not thumbnails.variants_recorded(file):
+        transaction.on_commit(
+            lambda: _generate_variants(sender, field_name, file)
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=User)
+def delete_image_variants(sender, instance, **kwargs):
+    file = getattr(instance, IMAGE_FIELDS[sender])
+    if file:
+        transaction.on_commit(lambda: thumbnails.delete_variants(file))
+
+
+@receiver(post_save, sender=Recipe)
+def remember_recipe_exists(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(
+            lambda: shortlinks.set_recipe_exists(instance.pk, True)
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+def forget_recipe_exists(sender, instance, **kwargs):
+    recipe_id = instance.pk
+    transaction.on_commit(
+        lambda: shortlinks.set_recipe_exists(recipe_id, False)
+    )
+
+
+@receiver(post_migrate)
+def install_search_triggers(sender, using, **kwargs):
+    connection = connections[using]
+    if (
+        sender.name == "recipes"
+        and "recipes_recipe_fts" in connection.introspection.table_names()
+    ):
+        search.install_triggers(connection)
+
+
+@receiver(post_migrate)
+def clear_caches(sender, **kwargs):
+    # A migrated or flushed database reuses the ids that the cached recipe
+    # representations, version stamps and short links are keyed by.
+    if sender.name == "recipes":
+        for cache in caches.all():
+            cache.clear()
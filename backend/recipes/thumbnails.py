@@ -0,0 +1,107 @@
+"""Fixed-size variants of the uploaded recipe images and avatars.
+
+Variants live next to the original in a ``variants`` folder and their
+names are derived from the original name, so their URLs can be built
+without touching the storage. Once the variants are saved, the name of the
+original is recorded in the ``<field>_variants_name`` column of the rows
+that use it; until then, or if generation failed, the original is served.
+"""
+import posixpath
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.dispatch import Signal
+from PIL import Image, ImageOps
+
+
+# Sent with ``field_name`` and ``name`` after the rows using the image
+# ``name`` are marked, so the caches holding their URLs can drop them.
+variants_generated = Signal()
+
+
+EXTENSIONS = {"WEBP": "webp", "JPEG": "jpg"}
+SAVE_OPTIONS = {
+    "WEBP": dict(quality=80, method=4),
+    "JPEG": dict(quality=80, optimize=True, progressive=True),
+}
+
+
+def variant_name(name, variant):
+    directory, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    extension = EXTENSIONS[settings.IMAGE_VARIANT_FORMAT]
+    return posixpath.join(
+        directory, "variants", f"{stem}-{variant}.{extension}"
+    )
+
+
+def variants_name_field(field_name):
+    return f"{field_name}_variants_name"
+
+
+def variants_recorded(file):
+    """Whether the variants of the file of a model field were recorded."""
+    return file.instance is not None and file.name == getattr(
+        file.instance, variants_name_field(file.field.name), None
+    )
+
+
+def variant_url(file, variant):
+    """URL of the variant, or of the original if it is not recorded."""
+    if variants_recorded(file):
+        return file.storage.url(variant_name(file.name, variant))
+    return file.url
+
+
+def variant_urls(file):
+    return {
+        variant: variant_url(file, variant)
+        for variant in settings.IMAGE_VARIANTS
+    }
+
+
+def thumbnail_url(file):
+    return variant_url(file, "thumbnail")
+
+
+def has_variants(file):
+    """Whether the storage has every variant; for writes, not for URLs."""
+    return all(
+        file.storage.exists(variant_name(file.name, variant))
+        for variant in settings.IMAGE_VARIANTS
+    )
+
+
+def generate_variants(file):
+    """Crop and scale the image to every size from ``IMAGE_VARIANTS``."""
+    file_format = settings.IMAGE_VARIANT_FORMAT
+    largest = tuple(map(max, zip(*settings.IMAGE_VARIANTS.values())))
+    with file.storage.open(file.name) as source:
+        image = Image.open(source)
+        image.draft("RGB", largest)
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA") or file_format == "JPEG":
+            image = image.convert("RGB")
+        for variant, size in settings.IMAGE_VARIANTS.items():
+            with tempfile.SpooledTemporaryFile() as output:
+                ImageOps.fit(image, size, Image.LANCZOS).save(
+                    output, file_format, **SAVE_OPTIONS[file_format]
+                )
+                output.seek(0)
+                name = variant_name(file.name, variant)
+                file.storage.delete(name)
+                file.storage.save(name, File(output))
+
+
+def record_variants(model, field_name, name):
+    """Mark the rows using the image ``name`` as having its variants."""
+    model.objects.filter(**{field_name: name}).update(
+        **{variants_name_field(field_name): name}
+    )
+    variants_generated.send(sender=model, field_name=field_name, name=name)
+
+
+def delete_variants(file):
+    for variant in settings.IMAGE_VARIANTS:
+        file.storage.delete(variant_name(file.name, variant))
@@ -1,4 +1,4 @@
-from django.urls import path
+from django.urls import re_path
 
 from . import views
 
@@ -6,5 +6,9 @@ from . import views
 app_name = 'recipes'
 
 urlpatterns = [
-    path('<int:pk>/', views.short_link_view, name='short_link'),
+    re_path(
+        r'^(?P<code>[0-9A-Za-z]+)/$',
+        views.short_link_view,
+        name='short_link',
+    ),
 ]
@@ -1,5 +1,13 @@
-from django.shortcuts import redirect
+from django.http import HttpResponse
 
+from . import shortlinks
 
-def short_link_view(request, pk):
-    return redirect("api:recipes-detail", kwargs={"pk": pk})
+
+def short_link_view(request, code):
+    """Fallback for servers that do not wrap the application with
+    ``shortlinks.wsgi`` or ``shortlinks.asgi``."""
+    status, headers = shortlinks.resolve(code)
+    response = HttpResponse(status=status)
+    for header, value in headers.items():
+        response[header] = value
+    return response